@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 """Analyze why pages/links decrease at depth 5-6"""
 
-from csuchico_graph import create_csuchico_graph
+from csuchico_graph_cached import get_csuchico_graph, get_csuchico_graph_arrays
 from collections import defaultdict
 
-G = create_csuchico_graph()
+import numpy as np
+
+G = get_csuchico_graph()
 
 print("=" * 70)
 print("DEPTH PATTERN ANALYSIS")
@@ -44,28 +46,32 @@ print("  - At depth 0-3: Discovering new parts of the site")
 print("  - At depth 4: Peak discovery (3918 new links)")
 print("  - At depth 5-6: Most pages already visited from earlier depths")
 
-# Calculate how many edges point to already-visited nodes
+# Calculate how many edges point to already-visited nodes.
+# Every edge gets a (source depth, category) code and one bincount tallies them
+# all; -1 stands in for nodes without a recorded depth.
+UNKNOWN, SAME, EARLIER, LATER = range(4)
+arrays = get_csuchico_graph_arrays()
+node_depth = np.fromiter((d for _, d in G.nodes(data='depth', default=-1)), np.int64, len(arrays.nodes))
+src_depth = node_depth[arrays.sources]
+tgt_depth = node_depth[arrays.indices]
+known = src_depth >= 0
+src_depth, tgt_depth = src_depth[known], tgt_depth[known]
+category = np.select(
+    [tgt_depth < 0, tgt_depth == src_depth, tgt_depth < src_depth],
+    [UNKNOWN, SAME, EARLIER],
+    default=LATER,
+)
+num_depths = int(node_depth.max(initial=-1)) + 1
+edge_counts = np.bincount(src_depth * 4 + category, minlength=num_depths * 4).reshape(-1, 4)
+
 print("\n🔗 Edge Analysis by Depth:")
 for depth in sorted(nodes_by_depth.keys()):
     nodes_at_depth = nodes_by_depth[depth]
 
     # Count edges from this depth
-    edges_to_same_depth = 0
-    edges_to_earlier_depth = 0
-    edges_to_later_depth = 0
-    edges_to_unknown = 0
-
-    for node in nodes_at_depth:
-        for target in G.successors(node):
-            target_depth = G.nodes[target].get('depth')
-            if target_depth is None:
-                edges_to_unknown += 1
-            elif target_depth == depth:
-                edges_to_same_depth += 1
-            elif target_depth < depth:
-                edges_to_earlier_depth += 1
-            else:
-                edges_to_later_depth += 1
+    edges_to_unknown, edges_to_same_depth, edges_to_earlier_depth, edges_to_later_depth = (
+        int(count) for count in edge_counts[depth]
+    )
 
     total_edges = edges_to_same_depth + edges_to_earlier_depth + edges_to_later_depth + edges_to_unknown
 
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 """Check CSU Chico graph for duplicates and quality"""
 
-from csuchico_graph import create_csuchico_graph
+from csuchico_graph_cached import get_csuchico_graph, get_csuchico_graph_arrays
 from collections import Counter
+from heapq import nlargest
 
-G = create_csuchico_graph()
+G = get_csuchico_graph()
+arrays = get_csuchico_graph_arrays()
 
 print("=" * 60)
 print("GRAPH QUALITY CHECK")
@@ -33,13 +35,13 @@ print(f"  Unique nodes: {len(unique_nodes)}")
 print(f"  Duplicates: {len(all_nodes) - len(unique_nodes)}")
 
 # Edge statistics
-edge_counts = Counter(G.out_degree(node) for node in G.nodes())
+edge_counts = Counter(arrays.out_degree.tolist())
 print(f"\n📈 Out-Degree Distribution:")
 print(f"  Nodes with 0 out-edges (leaf nodes): {edge_counts[0]:,}")
 print(f"  Nodes with 1-10 out-edges: {sum(edge_counts[i] for i in range(1, 11)):,}")
 print(f"  Nodes with 11-50 out-edges: {sum(edge_counts[i] for i in range(11, 51)):,}")
 print(f"  Nodes with 51+ out-edges: {sum(edge_counts[i] for i in range(51, max(edge_counts.keys())+1)):,}")
-print(f"  Max out-degree: {max(dict(G.out_degree()).values())}")
+print(f"  Max out-degree: {arrays.out_degree.max()}")
 
 # Sample nodes
 print(f"\n🔎 Sample Nodes (first 10):")
@@ -53,10 +55,9 @@ for i, (node, data) in enumerate(G.nodes(data=True)):
 
 # Find hub nodes (highest out-degree)
 print(f"\n🌐 Top 10 Hub Nodes (highest out-degree):")
-top_hubs = sorted(G.nodes(), key=lambda n: G.out_degree(n), reverse=True)[:10]
-for i, node in enumerate(top_hubs, 1):
+top_hubs = nlargest(10, G.out_degree(), key=lambda kv: kv[1])
+for i, (node, out_deg) in enumerate(top_hubs, 1):
     label = G.nodes[node].get('label', node)
-    out_deg = G.out_degree(node)
     print(f"  {i:2d}. {label[:50]:50s} (out-degree: {out_deg})")
 
 print("\n" + "=" * 60)
\ No newline at end of file
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Memoized access to the CSU Chico website graph.
+
+Rebuilding the full scrape from ``csuchico_graph.py`` dominates the runtime of
+the analysis scripts, and several of them (plus the curated/refined/simplified
+builders) ask for it more than once per process. ``get_csuchico_graph`` builds
+the graph on first use and hands back the same object afterwards. When the
+scrapers have also written ``csuchico_graph.pkl.gz`` (see
+``save_as_pickle``) and it is at least as new as ``csuchico_graph.py``, the
+graph is loaded from that binary copy instead, skipping the 30 MB module.
+
+``graph_arrays`` flattens a graph into an integer-indexed CSR snapshot so
+degree counts and edge filters can run as NumPy array operations instead of
+NetworkX dict traversals. It builds a fresh snapshot on every call;
+``get_csuchico_graph_arrays`` is the memoized snapshot of the shared graph.
+
+The returned graph is shared: derive a copy or subgraph before mutating it.
+"""
+
+from __future__ import annotations
+
+import gzip
+import pickle
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Union
+
+import networkx as nx
+import numpy as np
+
+GRAPH_MODULE = Path(__file__).with_name("csuchico_graph.py")
+GRAPH_PICKLE = Path(__file__).with_name("csuchico_graph.pkl.gz")
+
+
+def load_csuchico_graph(path: Union[str, Path] = GRAPH_PICKLE) -> nx.DiGraph:
+    """Rebuild the graph from a pickle written by the scrapers' ``save_as_pickle``."""
+    with gzip.open(path, "rb") as f:
+        payload = pickle.load(f)
+    G = nx.DiGraph()
+    G.add_nodes_from((url, {"label": label}) for url, label in payload["nodes"])
+    G.add_edges_from(payload["edges"])
+    return G
+
+
+def _pickle_is_current() -> bool:
+    if not GRAPH_PICKLE.exists():
+        return False
+    if not GRAPH_MODULE.exists():
+        return True
+    return GRAPH_PICKLE.stat().st_mtime >= GRAPH_MODULE.stat().st_mtime
+
+
+@lru_cache(maxsize=1)
+def get_csuchico_graph() -> nx.DiGraph:
+    """Return the shared full CSU Chico graph, building it on first call."""
+    if _pickle_is_current():
+        return load_csuchico_graph()
+
+    from csuchico_graph import create_csuchico_graph
+
+    return create_csuchico_graph()
+
+
+@dataclass(frozen=True)
+class GraphArrays:
+    """
+    Compressed sparse row (CSR) snapshot of a directed graph.
+
+    Node ``i`` is ``nodes[i]`` with label ``labels[i]`` (``""`` when unset), and
+    its successors are ``indices[indptr[i]:indptr[i + 1]]``. ``sources``
+    repeats each row id once per edge, so ``zip(sources, indices)`` is the edge
+    list in ``graph.edges()`` order.
+    """
+
+    nodes: List[str]
+    labels: List[str]
+    index: Dict[str, int]
+    indptr: np.ndarray
+    indices: np.ndarray
+    sources: np.ndarray
+
+    @property
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    @property
+    def in_degree(self) -> np.ndarray:
+        return np.bincount(self.indices, minlength=len(self.nodes))
+
+
+def graph_arrays(graph: nx.DiGraph) -> GraphArrays:
+    """
+    Flatten ``graph`` into :class:`GraphArrays`.
+
+    The snapshot is not tied to ``graph``: later edits to the graph are not
+    reflected in it, so take a new snapshot after mutating.
+    """
+    nodes = list(graph.nodes())
+    labels = [label for _, label in graph.nodes(data="label", default="")]
+    index = {node: idx for idx, node in enumerate(nodes)}
+    num_nodes = len(nodes)
+
+    # graph.edges() yields edges grouped by source in node order, so the flat
+    # target list is already laid out row by row.
+    out_degree = np.fromiter(
+        (deg for _, deg in graph.out_degree()), dtype=np.int64, count=num_nodes
+    )
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(out_degree, out=indptr[1:])
+    indices = np.fromiter(
+        (index[target] for _, target in graph.edges()),
+        dtype=np.int64,
+        count=int(indptr[-1]),
+    )
+    sources = np.repeat(np.arange(num_nodes), out_degree)
+    return GraphArrays(
+        nodes=nodes,
+        labels=labels,
+        index=index,
+        indptr=indptr,
+        indices=indices,
+        sources=sources,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_csuchico_graph_arrays() -> GraphArrays:
+    """Return the shared snapshot of :func:`get_csuchico_graph`, built on first call."""
+    return graph_arrays(get_csuchico_graph())
+
+
+if __name__ == "__main__":
+    G = get_csuchico_graph()
+    print(f"Loaded graph with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
@@ -13,12 +13,12 @@ persona-specific navigation experiments.
 
 from __future__ import annotations
 
-from urllib.parse import urlparse
-from typing import Iterable, Set
+from heapq import nlargest
+from typing import Iterable, Set, Tuple
 
 import networkx as nx
 
-from csuchico_graph import create_csuchico_graph
+from csuchico_graph_cached import GraphArrays, get_csuchico_graph, get_csuchico_graph_arrays
 
 
 # Navigation / footer pages to exclude regardless of in-degree.
@@ -57,39 +57,55 @@ DEFAULT_ALLOWED_PREFIXES = (
 DEFAULT_NAV_IN_DEGREE_THRESHOLD = 800
 
 
-def _normalize_path(url: str) -> str:
-    parsed = urlparse(url)
-    path = parsed.path.lower()
-    return path.rstrip("/") or "/"
+def _prefix_tuple(prefixes: Iterable[str]) -> Tuple[str, ...]:
+    """Lowercase and strip prefixes into a tuple for ``str.startswith``."""
+    return tuple(prefix.lower().rstrip("/") for prefix in prefixes)
+
 
+_ALLOWED_PREFIXES = _prefix_tuple(DEFAULT_ALLOWED_PREFIXES)
+_EXCLUDE_PREFIXES = _prefix_tuple(DEFAULT_EXCLUDE_PREFIXES)
 
-def _matches_prefix(path: str, prefixes: Iterable[str]) -> bool:
-    return any(path.startswith(prefix) for prefix in prefixes)
+
+def _normalize_path(url: str) -> str:
+    # Slice the path directly; urlparse builds a full 6-tuple we never use.
+    parts = url.split("/", 3)
+    path = "/" + parts[3] if len(parts) > 3 else "/"
+    path = path.partition("?")[0].partition("#")[0].lower()
+    return path.rstrip("/") or "/"
 
 
 def _collect_allowed_nodes(
-    graph: nx.DiGraph,
+    arrays: GraphArrays,
     allowed_prefixes: Iterable[str],
     exclude_prefixes: Iterable[str],
     nav_threshold: int,
 ) -> Set[str]:
     allowed = set()
-    prefixes = tuple(prefix.lower().rstrip("/") for prefix in allowed_prefixes)
-    exclusions = tuple(prefix.lower().rstrip("/") for prefix in exclude_prefixes)
-
-    for node in graph.nodes():
+    prefixes = (
+        _ALLOWED_PREFIXES
+        if allowed_prefixes is DEFAULT_ALLOWED_PREFIXES
+        else _prefix_tuple(allowed_prefixes)
+    )
+    exclusions = (
+        _EXCLUDE_PREFIXES
+        if exclude_prefixes is DEFAULT_EXCLUDE_PREFIXES
+        else _prefix_tuple(exclude_prefixes)
+    )
+    for node, label, in_degree in zip(
+        arrays.nodes, arrays.labels, arrays.in_degree.tolist()
+    ):
         if "?" in node or "#" in node:
             continue
 
         path = _normalize_path(node)
-        if _matches_prefix(path, exclusions):
+        if path.startswith(exclusions):
             continue
-        if graph.in_degree(node) >= nav_threshold:
+        if in_degree >= nav_threshold:
             continue
-        label = graph.nodes[node].get("label", "").lower()
+        label = label.lower()
         if "contact" in label or "land acknowledgement" in label:
             continue
-        if _matches_prefix(path, prefixes):
+        if path.startswith(prefixes):
             allowed.add(node)
 
     return allowed
@@ -115,9 +131,9 @@ def create_csuchico_graph_curated(
         Any node with an in-degree equal to or above this threshold is considered
         a navigation hub and removed.
     """
-    raw = create_csuchico_graph()
+    raw = get_csuchico_graph()
     allowed_nodes = _collect_allowed_nodes(
-        raw,
+        get_csuchico_graph_arrays(),
         allowed_prefixes=allowed_prefixes,
         exclude_prefixes=exclude_prefixes,
         nav_threshold=nav_in_degree_threshold,
@@ -126,7 +142,7 @@ def create_csuchico_graph_curated(
     curated = raw.subgraph(allowed_nodes).copy()
 
     # Drop isolated nodes (no edges after filtering).
-    isolated = [node for node in curated.nodes() if curated.degree(node) == 0]
+    isolated = [node for node, deg in curated.degree() if deg == 0]
     curated.remove_nodes_from(isolated)
 
     return curated
@@ -138,7 +154,7 @@ if __name__ == "__main__":
     print("Nodes:", G.number_of_nodes())
     print("Edges:", G.number_of_edges())
 
-    in_degrees = sorted(G.in_degree(), key=lambda kv: kv[1], reverse=True)[:10]
+    in_degrees = nlargest(10, G.in_degree(), key=lambda kv: kv[1])
     print("\nTop inbound nodes:")
     for node, deg in in_degrees:
         print(f"{deg:5d} -> {G.nodes[node].get('label', node)}")
@@ -12,12 +12,14 @@ set is filtered to emphasise forward navigation through academic content.
 
 from __future__ import annotations
 
-from typing import Iterable, Set
-from urllib.parse import urlparse
+from functools import lru_cache
+from heapq import nlargest
+from typing import Iterable, Set, Tuple
 
 import networkx as nx
+import numpy as np
 
-from csuchico_graph import create_csuchico_graph
+from csuchico_graph_cached import get_csuchico_graph, get_csuchico_graph_arrays
 
 
 DEFAULT_NAV_KEYWORDS = (
@@ -43,8 +45,20 @@ DEFAULT_NAV_PATH_PREFIXES = (
 DEFAULT_NAV_IN_DEGREE_THRESHOLD = 500
 
 
+def _prefix_tuple(prefixes: Iterable[str]) -> Tuple[str, ...]:
+    """Strip trailing slashes into a tuple for ``str.startswith``."""
+    return tuple(prefix.rstrip("/") for prefix in prefixes)
+
+
+_NAV_PATH_PREFIXES = _prefix_tuple(DEFAULT_NAV_PATH_PREFIXES)
+
+
+@lru_cache(maxsize=None)
 def _normalize_path(url: str) -> str:
-    path = urlparse(url).path or "/"
+    # Slice the path directly; urlparse builds a full 6-tuple we never use.
+    parts = url.split("/", 3)
+    path = "/" + parts[3] if len(parts) > 3 else "/"
+    path = path.partition("?")[0].partition("#")[0]
 
     if path.endswith(("index.shtml", "index.html", "index.htm", "index.php")):
         path = path[: path.rfind("/")]
@@ -72,12 +86,11 @@ def _is_nav_target(
     label: str,
     nav_nodes: Set[str],
     nav_keywords: Iterable[str],
-    nav_prefixes: Iterable[str],
+    nav_prefixes: Tuple[str, ...],
 ) -> bool:
     if node in nav_nodes:
         return True
-    path = _normalize_path(node).lower()
-    if any(path.startswith(prefix.rstrip("/")) for prefix in nav_prefixes):
+    if _normalize_path(node).lower().startswith(nav_prefixes):
         return True
     label_lower = label.lower()
     return any(keyword in label_lower for keyword in nav_keywords)
@@ -89,33 +102,44 @@ def create_csuchico_graph_refined(
     nav_keywords: Iterable[str] = DEFAULT_NAV_KEYWORDS,
     nav_prefixes: Iterable[str] = DEFAULT_NAV_PATH_PREFIXES,
 ) -> nx.DiGraph:
-    raw = create_csuchico_graph()
+    raw = get_csuchico_graph()
+    arrays = get_csuchico_graph_arrays()
+    prefixes = (
+        _NAV_PATH_PREFIXES
+        if nav_prefixes is DEFAULT_NAV_PATH_PREFIXES
+        else _prefix_tuple(nav_prefixes)
+    )
+    nodes = arrays.nodes
     refined = nx.DiGraph()
     refined.add_nodes_from(raw.nodes(data=True))
 
     candidate_nav_nodes = {
-        node
-        for node, deg in raw.in_degree()
-        if deg >= nav_in_degree_threshold
+        nodes[idx] for idx in np.flatnonzero(arrays.in_degree >= nav_in_degree_threshold)
     }
 
-    edges_to_keep = []
-    for source, target in raw.edges():
-        source_path = _normalize_path(source)
-        target_path = _normalize_path(target)
-        label = raw.nodes[target].get("label", "")
-
-        if "?" in target or "#" in target:
-            continue
-        if _is_ancestor(target_path, source_path):
-            continue
-        if _is_nav_target(target, label, candidate_nav_nodes, nav_keywords, nav_prefixes):
-            continue
-
-        edges_to_keep.append((source, target))
-
-    refined.add_edges_from(edges_to_keep)
-    isolated = [node for node in refined.nodes() if refined.degree(node) == 0]
+    # Per-node work is done once here; edges into blocked targets are then
+    # dropped as one array mask, leaving only the ancestor check per edge.
+    paths = [_normalize_path(node) for node in nodes]
+    blocked = np.fromiter(
+        (
+            "?" in node
+            or "#" in node
+            or _is_nav_target(node, label, candidate_nav_nodes, nav_keywords, prefixes)
+            for node, label in zip(nodes, arrays.labels)
+        ),
+        dtype=bool,
+        count=len(nodes),
+    )
+    open_edges = ~blocked[arrays.indices]
+
+    refined.add_edges_from(
+        (nodes[source], nodes[target])
+        for source, target in zip(
+            arrays.sources[open_edges].tolist(), arrays.indices[open_edges].tolist()
+        )
+        if not _is_ancestor(paths[target], paths[source])
+    )
+    isolated = [node for node, deg in refined.degree() if deg == 0]
     refined.remove_nodes_from(isolated)
     return refined
 
@@ -125,7 +149,7 @@ if __name__ == "__main__":
     print("Refined CSU Chico graph")
     print("Nodes:", G.number_of_nodes())
     print("Edges:", G.number_of_edges())
-    in_degrees = sorted(G.in_degree(), key=lambda kv: kv[1], reverse=True)[:10]
+    in_degrees = nlargest(10, G.in_degree(), key=lambda kv: kv[1])
     print("\nTop inbound nodes:")
     for node, deg in in_degrees:
         print(f"{deg:5d} -> {G.nodes[node].get('label', node)}")
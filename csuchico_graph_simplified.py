@@ -21,11 +21,11 @@ Design goals:
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Set, Tuple
+from typing import Dict, FrozenSet, Iterable, List, Set
 
 import networkx as nx
 
-from csuchico_graph import create_csuchico_graph
+from csuchico_graph_cached import get_csuchico_graph
 
 
 # Inbound link counts above this threshold are treated as global navigation
@@ -44,7 +44,7 @@ class SimplifiedGraph:
 
     graph: nx.DiGraph
     nav_nodes: Set[str]
-    template_clusters: Dict[Tuple[str, ...], List[str]]
+    template_clusters: Dict[FrozenSet[str], List[str]]
 
     def get_cluster(self, node: str) -> List[str]:
         """Return all nodes that share the same content-level out-neighbors."""
@@ -91,13 +91,15 @@ def prune_navigation_edges(
     graph compact. All other nodes remain intact, even if they lose the bulk of
     their outgoing edges.
     """
-    pruned = graph.copy()
-    edges_to_remove = [
-        (source, target)
-        for source, target in pruned.edges()
-        if target in nav_nodes
-    ]
-    pruned.remove_edges_from(edges_to_remove)
+    # Copy only the edges we keep rather than cloning everything and removing.
+    pruned = graph.__class__()
+    pruned.graph.update(graph.graph)
+    pruned.add_nodes_from(graph.nodes(data=True))
+    pruned.add_edges_from(
+        (source, target, data)
+        for source, target, data in graph.edges(data=True)
+        if target not in nav_nodes
+    )
 
     isolated_nav = [node for node in nav_nodes if pruned.degree(node) == 0]
     pruned.remove_nodes_from(isolated_nav)
@@ -107,26 +109,29 @@ def prune_navigation_edges(
 def find_template_clusters(
     graph: nx.DiGraph,
     min_cluster_size: int = DEFAULT_MIN_TEMPLATE_CLUSTER,
-) -> Dict[Tuple[str, ...], List[str]]:
+) -> Dict[FrozenSet[str], List[str]]:
     """
     Group pages that still share identical outgoing links after pruning.
 
     Returns
     -------
     dict
-        Mapping from the sorted tuple of neighbor URLs to the list of pages
-        that share that signature. Only clusters with at least
-        ``min_cluster_size`` members are returned to keep the structure compact.
+        Mapping from the frozenset of neighbor URLs to the list of pages that
+        share that signature. Only pages with outgoing links are grouped, and
+        only clusters with at least ``min_cluster_size`` members are returned
+        to keep the structure compact.
     """
-    signature_to_nodes: Dict[Tuple[str, ...], List[str]] = {}
-    for node in graph.nodes():
-        successors = tuple(sorted(graph.successors(node)))
-        signature_to_nodes.setdefault(successors, []).append(node)
+    # A frozenset hashes order-independently in O(k), so no per-node sort.
+    signature_to_nodes: Dict[FrozenSet[str], List[str]] = {}
+    for node, successors in graph.adjacency():
+        if not successors:
+            continue
+        signature_to_nodes.setdefault(frozenset(successors), []).append(node)
 
     return {
         signature: nodes
         for signature, nodes in signature_to_nodes.items()
-        if len(nodes) >= min_cluster_size and signature
+        if len(nodes) >= min_cluster_size
     }
 
 
@@ -134,6 +139,7 @@ def create_simplified_graph(
     nav_in_degree_threshold: int = DEFAULT_NAV_IN_DEGREE_THRESHOLD,
     min_template_cluster: int = DEFAULT_MIN_TEMPLATE_CLUSTER,
     extra_nav_targets: Iterable[str] | None = None,
+    graph: nx.DiGraph | None = None,
 ) -> SimplifiedGraph:
     """
     Produce a simplified CSU Chico graph geared for structural analysis.
@@ -148,6 +154,9 @@ def create_simplified_graph(
     extra_nav_targets:
         Optional explicit URLs to treat as navigation nodes regardless of
         in-degree. Useful for experiments or manual overrides.
+    graph:
+        Optional prebuilt full graph. Defaults to the shared graph from
+        :func:`get_csuchico_graph`; it is copied before pruning, never mutated.
 
     Returns
     -------
@@ -156,7 +165,7 @@ def create_simplified_graph(
         that were removed, and clusters of pages that still share identical
         content-level out-links.
     """
-    full_graph = create_csuchico_graph()
+    full_graph = graph if graph is not None else get_csuchico_graph()
     nav_nodes = identify_nav_targets(
         full_graph,
         threshold=nav_in_degree_threshold,
@@ -172,12 +181,14 @@ def create_simplified_graph(
 
 
 if __name__ == "__main__":
-    simplified = create_simplified_graph()
+    full = get_csuchico_graph()
+    original_n = full.number_of_nodes()
+    simplified = create_simplified_graph(graph=full)
     G = simplified.graph
     print("=" * 70)
     print("SIMPLIFIED CSU CHICO GRAPH")
     print("=" * 70)
-    print(f"Original nodes: {create_csuchico_graph().number_of_nodes():,}")
+    print(f"Original nodes: {original_n:,}")
     print(f"Simplified nodes: {G.number_of_nodes():,}")
     print(f"Simplified edges: {G.number_of_edges():,}")
     print(f"Navigation nodes removed: {len(simplified.nav_nodes)}")
@@ -10,12 +10,14 @@ dominate the walks.
 
 from __future__ import annotations
 
-import random
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Sequence, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple, TypeVar
 
 import networkx as nx
+import numpy as np
 
+from csuchico_graph_cached import GraphArrays, graph_arrays
 from csuchico_graph_refined import create_csuchico_graph_refined
 
 
@@ -91,61 +93,205 @@ PERSONAS: Dict[str, PersonaConfig] = {
 }
 
 
+@dataclass
+class TransitionMatrix:
+    """
+    Persona transitions in compressed sparse row (CSR) form.
+
+    Successors of ``nodes[i]`` are ``targets[indptr[i]:indptr[i + 1]]`` (indices
+    into ``nodes``) with matching probabilities in ``probs`` and per-row running
+    totals in ``cumprobs``. Nodes without successors have an empty row and are
+    reported as absent by ``in``.
+    """
+
+    nodes: List[str]
+    index: Dict[str, int]
+    indptr: np.ndarray
+    targets: np.ndarray
+    probs: np.ndarray
+    cumprobs: np.ndarray
+
+    def __contains__(self, node: object) -> bool:
+        idx = self.index.get(node)
+        return idx is not None and self.indptr[idx] < self.indptr[idx + 1]
+
+    def __getitem__(self, node: str) -> List[Tuple[str, float]]:
+        idx = self.index[node]
+        start, end = self.indptr[idx], self.indptr[idx + 1]
+        return [
+            (self.nodes[target], prob)
+            for target, prob in zip(
+                self.targets[start:end].tolist(), self.probs[start:end].tolist()
+            )
+        ]
+
+    def draw(self, node: str, u: float) -> str:
+        """Pick a successor of ``node`` by inverse-CDF lookup of ``u`` in [0, 1)."""
+        idx = self.index[node]
+        start, end = self.indptr[idx], self.indptr[idx + 1]
+        cum = self.cumprobs[start:end]
+        pos = int(np.searchsorted(cum, u * cum[-1], side="right"))
+        return self.nodes[self.targets[start + min(pos, end - start - 1)]]
+
+
+def _keyword_mask(texts: np.ndarray, keywords: Iterable[str]) -> np.ndarray:
+    """Flag nodes whose search text contains any keyword."""
+    mask = np.zeros(len(texts), dtype=bool)
+    for keyword in keywords:
+        mask |= np.char.find(texts, keyword) >= 0
+    return mask
+
+
+@dataclass
+class _PersonaInputs:
+    """Persona-independent arrays shared by every persona on one graph."""
+
+    arrays: GraphArrays
+    search_text: np.ndarray
+    same_department: np.ndarray
+
+
+def _persona_inputs(graph: nx.DiGraph) -> _PersonaInputs:
+    """Precompute node text and edge flags so every persona on ``graph`` reuses them."""
+    arrays = graph_arrays(graph)
+
+    # One lowercased "url NUL label" string per node: a single scan per keyword
+    # covers both fields, and the separator keeps matches from spanning them.
+    search_text = np.array(
+        [
+            f"{node.lower()}\x00{label.lower()}"
+            for node, label in zip(arrays.nodes, arrays.labels)
+        ],
+        dtype=str,
+    )
+
+    # Department directories become small integer ids (-1 for shallow URLs),
+    # so the per-edge test is one vectorized comparison.
+    department_ids: Dict[str, int] = {}
+    department = np.fromiter(
+        (
+            -1 if prefix is None else department_ids.setdefault(prefix, len(department_ids))
+            for prefix in map(_department_prefix, arrays.nodes)
+        ),
+        dtype=np.int64,
+        count=len(arrays.nodes),
+    )
+    source_department = department[arrays.sources]
+    same_department = (source_department >= 0) & (
+        source_department == department[arrays.indices]
+    )
+    return _PersonaInputs(
+        arrays=arrays, search_text=search_text, same_department=same_department
+    )
+
+
 def _build_transition_matrix(
-    graph: nx.DiGraph, config: PersonaConfig
-) -> Dict[str, List[Tuple[str, float]]]:
+    inputs: _PersonaInputs, config: PersonaConfig
+) -> TransitionMatrix:
     """Compute weighted transitions for a persona."""
-    transitions: Dict[str, List[Tuple[str, float]]] = {}
-    for node in graph.nodes():
-        successors = list(graph.successors(node))
-        if not successors:
-            continue
-
-        weights: List[float] = []
-        for target in successors:
-            weight = 1.0
-            target_label = graph.nodes[target].get("label", "")
-            url_lower = target.lower()
-            label_lower = target_label.lower()
-
-            if any(keyword in url_lower or keyword in label_lower for keyword in config.keywords):
-                weight *= config.keyword_boost
-
-            if any(keyword in url_lower or keyword in label_lower for keyword in config.avoid_keywords):
-                weight *= config.avoid_penalty
-
-            # Encourage staying within the same directory path.
-            if _same_department_path(node, target):
-                weight *= 1.6
-
-            weights.append(weight)
-
-        # If all weights collapsed to zero (extreme penalty), fall back to uniform.
-        if not any(weight > 0 for weight in weights):
-            weights = [1.0 for _ in successors]
-
-        # Normalize to probabilities.
-        total = sum(weights)
-        transitions[node] = [
-            (succ, weight / total) for succ, weight in zip(successors, weights)
-        ]
-    return transitions
+    arrays = inputs.arrays
+    num_nodes = len(arrays.nodes)
+    num_edges = len(arrays.indices)
+    out_degree, indptr = arrays.out_degree, arrays.indptr
+    sources, targets = arrays.sources, arrays.indices
 
+    # Keyword flags are per node, so each target is scanned once, not per edge.
+    keyword_mask = _keyword_mask(inputs.search_text, config.keywords)
+    avoid_mask = _keyword_mask(inputs.search_text, config.avoid_keywords)
 
-def _same_department_path(source: str, target: str) -> bool:
-    """Heuristic: check if source and target share the same department directory."""
-    source_parts = source.split("/")
-    target_parts = target.split("/")
-    if len(source_parts) < 6 or len(target_parts) < 6:
-        return False
-    return source_parts[:6] == target_parts[:6]
+    weights = np.ones(num_edges)
+    weights[keyword_mask[targets]] *= config.keyword_boost
+    weights[avoid_mask[targets]] *= config.avoid_penalty
+    # Encourage staying within the same directory path.
+    weights[inputs.same_department] *= 1.6
+
+    # If all weights of a row collapsed to zero (extreme penalty), fall back to uniform.
+    positive = np.bincount(sources, weights=weights > 0, minlength=num_nodes)
+    weights[positive[sources] == 0] = 1.0
+
+    # Normalize to probabilities.
+    totals = np.bincount(sources, weights=weights, minlength=num_nodes)
+    probs = weights / totals[sources]
+
+    # Walks never stay put when another successor exists: drop self-loops from
+    # rows with alternatives and renormalize, which is the same distribution as
+    # redrawing among the remaining successors whenever the self-loop is hit.
+    self_loops = (sources == targets) & (out_degree[sources] > 1)
+    if self_loops.any():
+        remaining = np.bincount(
+            sources, weights=np.where(self_loops, 0.0, probs), minlength=num_nodes
+        )
+        rows = self_loops & (remaining[sources] > 0)
+        rerouted = np.isin(sources, sources[rows])
+        probs[rows] = 0.0
+        probs[rerouted] /= remaining[sources[rerouted]]
+
+    # Running totals restart at every row so each slice is a ready-made CDF.
+    cumprobs = np.cumsum(probs)
+    row_offsets = np.concatenate(([0.0], cumprobs))[indptr[:-1]]
+    cumprobs -= row_offsets[sources]
+    return TransitionMatrix(
+        nodes=arrays.nodes,
+        index=arrays.index,
+        indptr=indptr,
+        targets=targets,
+        probs=probs,
+        cumprobs=cumprobs,
+    )
+
+
+def _department_prefix(url: str) -> str | None:
+    """Heuristic department directory: the first six ``/``-separated parts.
+
+    Two URLs share a department when their prefixes are equal; URLs with fewer
+    than six parts have no department.
+    """
+    parts = url.split("/", 6)
+    if len(parts) < 6:
+        return None
+    return "/".join(parts[:6])
+
+
+T = TypeVar("T")
+
+
+class UniformPool:
+    """
+    Uniform [0, 1) source backed by ``numpy.random.Generator``.
+
+    Uniforms are drawn from PCG64 in blocks and handed out one at a time, so a
+    walk pays one list index per draw instead of one generator call. Exposes
+    the ``random``/``choice``/``randint`` subset of ``random.Random`` used by
+    :func:`sample_trajectory`.
+    """
+
+    def __init__(self, seed: int | None = None, block_size: int = 4096) -> None:
+        self._generator = np.random.default_rng(seed)
+        self._block_size = block_size
+        self._block: List[float] = []
+        self._pos = 0
+
+    def random(self) -> float:
+        if self._pos == len(self._block):
+            self._block = self._generator.random(self._block_size).tolist()
+            self._pos = 0
+        value = self._block[self._pos]
+        self._pos += 1
+        return value
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return seq[int(self.random() * len(seq))]
+
+    def randint(self, a: int, b: int) -> int:
+        """Return an integer in ``[a, b]``, both ends included."""
+        return a + int(self.random() * (b - a + 1))
 
 
 def sample_trajectory(
     persona: str,
-    transitions: Dict[str, List[Tuple[str, float]]],
+    transitions: TransitionMatrix,
     config: PersonaConfig,
-    rng: random.Random,
+    rng: UniformPool,
 ) -> List[str]:
     """Draw a single trajectory for the persona."""
     current = rng.choice(config.start_nodes)
@@ -155,16 +301,7 @@ def sample_trajectory(
     for _ in range(length - 1):
         if current not in transitions:
             break
-        choices, probs = zip(*transitions[current])
-        next_node = rng.choices(choices, probs)[0]
-        if next_node == current and len(choices) > 1:
-            alternatives = [(c, p) for c, p in transitions[current] if c != current]
-            if alternatives:
-                alt_choices, alt_probs = zip(*alternatives)
-                total = sum(alt_probs)
-                alt_probs = [p / total for p in alt_probs]
-                next_node = rng.choices(alt_choices, alt_probs)[0]
-        current = next_node
+        current = transitions.draw(current, rng.random())
         trajectory.append(current)
 
         if rng.random() < config.stop_probability:
@@ -172,14 +309,32 @@ def sample_trajectory(
     return trajectory
 
 
+@lru_cache(maxsize=None)
+def _get_refined_graph() -> nx.DiGraph:
+    return create_csuchico_graph_refined()
+
+
+@lru_cache(maxsize=None)
+def _refined_persona_inputs() -> _PersonaInputs:
+    return _persona_inputs(_get_refined_graph())
+
+
 def generate_samples(
-    persona: str, steps: int = 5, seed: int = 13
+    persona: str,
+    steps: int = 5,
+    seed: int = 13,
+    graph: nx.DiGraph | None = None,
 ) -> List[List[str]]:
-    """Convenience wrapper to generate a handful of sample trajectories."""
+    """
+    Convenience wrapper to generate a handful of sample trajectories.
+
+    ``graph`` defaults to the memoized refined graph. A graph passed in is
+    re-read on every call, so edits made between calls are picked up.
+    """
     config = PERSONAS[persona]
-    graph = create_csuchico_graph_refined()
-    transitions = _build_transition_matrix(graph, config)
-    rng = random.Random(seed)
+    inputs = _refined_persona_inputs() if graph is None else _persona_inputs(graph)
+    transitions = _build_transition_matrix(inputs, config)
+    rng = UniformPool(seed)
     return [
         sample_trajectory(persona, transitions, config, rng)
         for _ in range(steps)
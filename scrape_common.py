@@ -0,0 +1,105 @@
+"""
+Helpers shared by scrape_csuchico.py and scrape_csuchico_fast.py
+URL filtering constants, HTML decoding and robots.txt loading
+"""
+
+import codecs
+import re
+import sys
+from urllib.parse import urljoin
+from urllib.robotparser import RobotFileParser
+
+import lxml.html
+
+
+USER_AGENT = 'Mozilla/5.0 (Educational Research Project)'
+
+# Hosts whose pages belong in the graph
+ALLOWED_NETLOCS = frozenset({'www.csuchico.edu', 'csuchico.edu'})
+
+# Non-HTML resources (matched against the lowercased path)
+SKIP_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.zip',
+                   '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+                   '.mp4', '.mp3', '.avi', '.mov', '.css', '.js')
+
+# Content-Types worth downloading and parsing
+HTML_CONTENT_TYPES = frozenset({'text/html', 'application/xhtml+xml'})
+
+# Links inside the site-wide navigation, header and footer
+NAV_HREFS_XPATH = '//nav//a/@href | //header//a/@href | //footer//a/@href'
+
+# Scheme + host prefixes of URLs that split_site_url handles without urlparse
+SITE_ORIGINS = tuple(f"{scheme}://{netloc}"
+                     for scheme in ('https', 'http')
+                     for netloc in sorted(ALLOWED_NETLOCS))
+
+
+# A charset declared inside the document (<meta charset> or http-equiv)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset', re.IGNORECASE)
+
+# Byte-order marks libxml2 detects on its own
+_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+
+def html_parser(content_type, content):
+    """
+    Return an lxml HTML parser pinned to the page's encoding, or None to let
+    libxml2 sniff it from the document.
+
+    A charset in the Content-Type header wins, as in browsers. Without one,
+    a BOM or <meta> declaration is left to libxml2; anything else is read as
+    UTF-8, since libxml2 would otherwise assume ISO-8859-1.
+    """
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            try:
+                return lxml.html.HTMLParser(encoding=value.strip().strip('"\''))
+            except LookupError:
+                break  # Unknown charset name: treat as undeclared
+
+    if content.startswith(_BOMS) or _META_CHARSET_RE.search(content, 0, 1024):
+        return None
+    return lxml.html.HTMLParser(encoding='utf-8')
+
+
+def split_site_url(url):
+    """
+    Split a plain http(s) csuchico.edu URL into (origin, path, query) by
+    slicing, with the fragment dropped. Returns None for anything urlparse
+    has to handle (other hosts, ports or userinfo, ;params, embedded
+    whitespace) so results always match urlparse.
+    """
+    if not url.startswith(SITE_ORIGINS):
+        return None
+    for origin in SITE_ORIGINS:
+        if url.startswith(origin):
+            break
+    rest = url[len(origin):]
+    if rest[:1] not in ('', '/', '?', '#') or '\t' in rest or '\r' in rest or '\n' in rest:
+        return None
+    path, _, query = rest.partition('#')[0].partition('?')
+    if ';' in path:
+        return None
+    return origin, path, query
+
+
+def load_robots(session, start_url):
+    """Fetch and parse the site's robots.txt through session"""
+    parser = RobotFileParser(urljoin(start_url, '/robots.txt'))
+    try:
+        response = session.get(parser.url, timeout=10)
+    except Exception as e:
+        # No rules to honour means no permission to crawl
+        print(f"Could not read robots.txt ({str(e)[:50]}), treating every URL as disallowed", file=sys.stderr)
+        parser.disallow_all = True
+    else:
+        # Like RobotFileParser.read(): 401/403 and 5xx block everything,
+        # any other 4xx means there is no robots.txt to honour
+        if response.ok:
+            parser.parse(response.text.splitlines())
+        elif 400 <= response.status_code < 500 and response.status_code not in (401, 403):
+            parser.allow_all = True
+        else:
+            parser.disallow_all = True
+    return parser
@@ -5,13 +5,32 @@ Builds a directed graph of the CSU Chico website structure
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml.etree import ParserError
+from lxml.html import soupparser
 from urllib.parse import urljoin, urlparse
 import networkx as nx
 import time
+from array import array
 from collections import deque, defaultdict
+from functools import lru_cache
+import gzip
+import pickle
 import sys
 
+from scrape_common import (
+    ALLOWED_NETLOCS,
+    HTML_CONTENT_TYPES,
+    NAV_HREFS_XPATH,
+    SKIP_EXTENSIONS,
+    USER_AGENT,
+    html_parser,
+    load_robots,
+    split_site_url,
+)
+
 
 class CSUChicoScraper:
     def __init__(self, start_url="https://www.csuchico.edu", max_depth=6, delay=2.0):
@@ -19,58 +38,88 @@ class CSUChicoScraper:
         self.max_depth = max_depth
         self.delay = delay
 
+        # HTTP session: reuse one keep-alive connection across fetches
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        })
+        # Retry transient failures (connection errors, 429/5xx) with
+        # exponential backoff, honouring any Retry-After the server sends
+        retry = Retry(
+            total=3,
+            backoff_factor=1.0,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
         # Graph structure
         self.graph = nx.DiGraph()
 
-        # Tracking
-        self.visited_urls = set()
+        # Tracking: each URL is interned to an integer id when first seen.
+        # The BFS queue holds ids; per-URL crawl state lives in parallel arrays.
+        self.visited_urls = {}  # Maps URLs to their ids
+        self.urls = []  # Maps ids back to URLs
+        self.url_depths = array('H')  # Depth at which each URL was discovered
+        self.url_parents = array('i')  # Id of the discovering page, -1 for none
         self.url_to_label = {}  # Maps URLs to their display labels
         self.nav_footer_links = set()  # Links that appear in nav/footer from homepage
+        self.robots = None  # Parsed robots.txt, fetched once when the crawl starts
 
         # Statistics
         self.stats_by_depth = defaultdict(lambda: {"pages": 0, "links": 0})
 
-    def is_valid_csuchico_url(self, url):
+    @staticmethod
+    @lru_cache(maxsize=200_000)
+    def is_valid_csuchico_url(url):
         """Check if URL is a valid CSU Chico page"""
-        parsed = urlparse(url)
+        parts = split_site_url(url)
+        if parts is not None:
+            return not parts[1].lower().endswith(SKIP_EXTENSIONS)
 
-        # Must be csuchico.edu domain
-        if not parsed.netloc.endswith('csuchico.edu'):
+        # Skip mailto and tel links
+        if url.startswith(('mailto:', 'tel:')):
             return False
 
-        # Must be www subdomain or base domain
-        if parsed.netloc not in ['www.csuchico.edu', 'csuchico.edu']:
-            return False
+        parsed = urlparse(url)
 
-        # Skip non-HTML resources
-        skip_extensions = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.zip',
-                          '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
-                          '.mp4', '.mp3', '.avi', '.mov', '.css', '.js')
-        if any(parsed.path.lower().endswith(ext) for ext in skip_extensions):
+        # Must be www subdomain or base domain of csuchico.edu
+        if parsed.netloc not in ALLOWED_NETLOCS:
             return False
 
-        # Skip mailto and tel links
-        if parsed.scheme in ['mailto', 'tel']:
+        # Skip non-HTML resources
+        if parsed.path.lower().endswith(SKIP_EXTENSIONS):
             return False
 
         return True
 
-    def normalize_url(self, url):
+    @staticmethod
+    @lru_cache(maxsize=200_000)
+    def normalize_url(url):
         """Normalize URL by removing fragments and trailing slashes"""
-        parsed = urlparse(url)
+        parts = split_site_url(url)
+        if parts is None:
+            parsed = urlparse(url)
+            parts = (f"{parsed.scheme}://{parsed.netloc}", parsed.path, parsed.query)
+        origin, path, query = parts
         # Remove fragment, normalize trailing slash
-        normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-        if normalized.endswith('/') and len(parsed.path) > 1:
+        normalized = origin + path
+        if normalized.endswith('/') and len(path) > 1:
             normalized = normalized[:-1]
-        if parsed.query:
-            normalized += f"?{parsed.query}"
+        if query:
+            normalized += f"?{query}"
         return normalized
 
-    def get_page_title(self, soup, url):
+    def get_page_title(self, tree, url):
         """Extract a meaningful title from the page"""
         # Try <title> tag first
-        if soup.title and soup.title.string:
-            title = soup.title.string.strip()
+        title_el = tree.find('.//title')
+        if title_el is not None and title_el.text:
+            title = title_el.text.strip()
             # Clean up common patterns
             title = title.replace(' | CSU Chico', '')
             title = title.replace(' - CSU Chico', '')
@@ -78,9 +127,9 @@ class CSUChicoScraper:
             return title[:100]  # Limit length
 
         # Try <h1> tag
-        h1 = soup.find('h1')
-        if h1:
-            return h1.get_text().strip()[:100]
+        h1 = tree.find('.//h1')
+        if h1 is not None:
+            return h1.text_content().strip()[:100]
 
         # Fall back to URL path
         path = urlparse(url).path
@@ -89,73 +138,111 @@ class CSUChicoScraper:
 
         return "CSU Chico Home"
 
-    def extract_links(self, soup, base_url, is_homepage=False):
-        """Extract all valid links from the page"""
-        links = []
+    def extract_links(self, tree, base_url, is_homepage=False):
+        """
+        Yield (url, text) for each valid link on the page, skipping nav/footer
+        links already crawled from the homepage
+        """
+        nav_footer_links = self.nav_footer_links
+        visited_urls = self.visited_urls
 
         # If this is the homepage, identify nav/footer links
         if is_homepage:
-            # Find navigation and footer elements
-            nav_elements = soup.find_all(['nav', 'header', 'footer'])
-            for element in nav_elements:
-                for a_tag in element.find_all('a', href=True):
-                    href = a_tag['href']
-                    full_url = urljoin(base_url, href)
-                    normalized = self.normalize_url(full_url)
-                    if self.is_valid_csuchico_url(normalized):
-                        self.nav_footer_links.add(normalized)
+            for href in tree.xpath(NAV_HREFS_XPATH, smart_strings=False):
+                normalized = self.normalize_url(urljoin(base_url, href))
+                if self.is_valid_csuchico_url(normalized):
+                    self.nav_footer_links.add(normalized)
 
         # Extract all links
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
-            full_url = urljoin(base_url, href)
-            normalized = self.normalize_url(full_url)
+        for a_tag in tree.xpath('//a[@href]'):
+            normalized = self.normalize_url(urljoin(base_url, a_tag.get('href')))
 
             if not self.is_valid_csuchico_url(normalized):
                 continue
+            if not is_homepage and normalized in nav_footer_links and normalized in visited_urls:
+                continue
 
             # Get link text for label (first occurrence wins)
-            link_text = a_tag.get_text().strip()
+            link_text = a_tag.text_content().strip()
             if not link_text:
                 link_text = a_tag.get('title', '')
 
-            links.append((normalized, link_text))
-
-        return links
+            yield normalized, link_text
 
     def fetch_page(self, url):
         """Fetch and parse a page"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Educational Research Project)',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            }
-            response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-            response.raise_for_status()
-
-            # Check if we got redirected to a different domain
-            if not self.is_valid_csuchico_url(response.url):
-                return None, []
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-            return soup, response.url  # Return actual URL after redirects
+            # Stream so the body is only downloaded once we know it is HTML
+            with self.session.get(url, timeout=10, allow_redirects=True, stream=True) as response:
+                response.raise_for_status()
+
+                # Check if we got redirected to a different domain
+                if not self.is_valid_csuchico_url(response.url):
+                    return None, []
+
+                # Skip PDFs and other binaries the extension filter missed
+                content_type = response.headers.get('Content-Type', '')
+                mime_type = content_type.partition(';')[0].strip().lower()
+                if mime_type and mime_type not in HTML_CONTENT_TYPES:
+                    return None, None
+
+                # Read the body in one call instead of through .content's chunk buffer
+                content = response.raw.read(decode_content=True)
+
+            try:
+                tree = lxml.html.document_fromstring(
+                    content, parser=html_parser(content_type, content)
+                )
+            except ParserError:
+                # libxml2 gives up on some degenerate documents; let
+                # BeautifulSoup build the tree instead
+                tree = soupparser.fromstring(content)
+            return tree, response.url  # Return actual URL after redirects
 
         except Exception as e:
             print(f"  ✗ Error fetching {url}: {str(e)[:100]}", file=sys.stderr)
             return None, None
 
+    def _load_robots(self):
+        """Fetch robots.txt once and adopt its rules and Crawl-delay"""
+        self.robots = load_robots(self.session, self.start_url)
+
+        crawl_delay = self.robots.crawl_delay(USER_AGENT)
+        if crawl_delay is not None and float(crawl_delay) > self.delay:
+            self.delay = float(crawl_delay)
+            print(f"robots.txt Crawl-delay: using {self.delay}s between requests")
+
+    def is_allowed_by_robots(self, url):
+        """Check a URL against robots.txt before it is queued"""
+        return self.robots is None or self.robots.can_fetch(USER_AGENT, url)
+
+    def _mark_visited(self, url, depth, parent_id=-1):
+        """Intern a newly seen URL and return its id"""
+        url_id = len(self.urls)
+        self.visited_urls[url] = url_id
+        self.urls.append(url)
+        self.url_depths.append(depth)
+        self.url_parents.append(parent_id)
+        return url_id
+
     def scrape(self):
         """Main scraping function using BFS"""
         print(f"Starting scrape of {self.start_url}")
         print(f"Max depth: {self.max_depth}, Delay: {self.delay}s")
         print("=" * 80)
 
-        # BFS queue: (url, depth, parent_url)
-        queue = deque([(self.start_url, 0, None)])
-        self.visited_urls.add(self.start_url)
+        self._load_robots()
+        if not self.is_allowed_by_robots(self.start_url):
+            raise RuntimeError(f"robots.txt disallows crawling {self.start_url}")
+
+        # BFS queue of URL ids
+        queue = deque([self._mark_visited(self.start_url, 0)])
 
         while queue:
-            current_url, depth, parent_url = queue.popleft()
+            page_id = queue.popleft()
+            current_url = self.urls[page_id]
+            depth = self.url_depths[page_id]
+            parent_id = self.url_parents[page_id]
 
             if depth > self.max_depth:
                 continue
@@ -163,8 +250,8 @@ class CSUChicoScraper:
             print(f"\n[Depth {depth}] Fetching: {current_url}")
 
             # Fetch page
-            soup, final_url = self.fetch_page(current_url)
-            if soup is None:
+            tree, final_url = self.fetch_page(current_url)
+            if tree is None:
                 continue
 
             # Update URL if redirected
@@ -173,37 +260,30 @@ class CSUChicoScraper:
                 if current_url in self.visited_urls:
                     print(f"  ↪ Redirected to already-visited page")
                     continue
-                self.visited_urls.add(current_url)
+                page_id = self._mark_visited(current_url, depth, parent_id)
 
             # Get page title
-            title = self.get_page_title(soup, current_url)
+            title = self.get_page_title(tree, current_url)
             self.url_to_label[current_url] = title
 
             # Add node to graph
             self.graph.add_node(current_url, label=title, depth=depth)
 
             # Add edge from parent
-            if parent_url:
-                self.graph.add_edge(parent_url, current_url)
+            if parent_id >= 0:
+                self.graph.add_edge(self.urls[parent_id], current_url)
 
-            # Extract links
-            is_homepage = (depth == 0)
-            links = self.extract_links(soup, current_url, is_homepage)
-
-            # Filter links if not homepage
-            if not is_homepage:
-                # Skip nav/footer links that we already crawled from homepage
-                links = [(url, text) for url, text in links
-                        if url not in self.nav_footer_links or url not in self.visited_urls]
-
-            print(f"  ✓ Found {len(links)} links, Title: '{title[:60]}'")
-
-            # Add links to queue
+            # Extract links and add them to the queue in a single pass
+            links_found = 0
             new_links_added = 0
-            for link_url, link_text in links:
+            for link_url, link_text in self.extract_links(tree, current_url, depth == 0):
+                links_found += 1
                 if link_url not in self.visited_urls:
-                    self.visited_urls.add(link_url)
-                    queue.append((link_url, depth + 1, current_url))
+                    link_id = self._mark_visited(link_url, depth + 1, page_id)
+                    if not self.is_allowed_by_robots(link_url):
+                        # Remember it so later pages skip it too, but never fetch it
+                        continue
+                    queue.append(link_id)
                     new_links_added += 1
 
                     # Store label from first occurrence
@@ -214,12 +294,14 @@ class CSUChicoScraper:
                     if link_url in self.graph:
                         self.graph.add_edge(current_url, link_url)
 
+            print(f"  ✓ Found {links_found} links, Title: '{title[:60]}'")
+
             # Update stats
             self.stats_by_depth[depth]["pages"] += 1
             self.stats_by_depth[depth]["links"] += new_links_added
 
             # Print depth summary periodically
-            if self.stats_by_depth[depth]["pages"] % 10 == 0 or queue[0][1] != depth if queue else True:
+            if self.stats_by_depth[depth]["pages"] % 10 == 0 or self.url_depths[queue[0]] != depth if queue else True:
                 self.print_depth_summary(depth)
 
             # Rate limiting
@@ -250,7 +332,7 @@ class CSUChicoScraper:
 
     def save_as_python_file(self, output_file="csuchico_graph.py"):
         """Save graph as a Python file that can be imported"""
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
             f.write('"""\n')
             f.write('CSU Chico Website Graph\n')
             f.write(f'Scraped from {self.start_url}\n')
@@ -265,11 +347,12 @@ class CSUChicoScraper:
             # Add nodes with labels
             f.write('    # Add nodes with labels\n')
             f.write('    nodes = [\n')
+            # repr() quotes and escapes each label as a valid literal
+            node_lines = []
             for node in self.graph.nodes():
                 label = self.url_to_label.get(node, node)
-                # Escape quotes in label
-                label = label.replace("'", "\\'")
-                f.write(f"        ('{node}', '{label}'),\n")
+                node_lines.append(f"        ({node!r}, {label!r}),\n")
+            f.writelines(node_lines)
             f.write('    ]\n')
             f.write('    for url, label in nodes:\n')
             f.write('        G.add_node(url, label=label)\n\n')
@@ -277,8 +360,10 @@ class CSUChicoScraper:
             # Add edges
             f.write('    # Add edges\n')
             f.write('    edges = [\n')
-            for source, target in self.graph.edges():
-                f.write(f"        ('{source}', '{target}'),\n")
+            f.writelines(
+                f"        ({source!r}, {target!r}),\n"
+                for source, target in self.graph.edges()
+            )
             f.write('    ]\n')
             f.write('    G.add_edges_from(edges)\n\n')
             f.write('    return G\n\n')
@@ -294,6 +379,19 @@ class CSUChicoScraper:
 
         print(f"\n✓ Saved graph to {output_file}")
 
+    def save_as_pickle(self, output_file="csuchico_graph.pkl.gz"):
+        """Save graph as a gzipped pickle, loadable with csuchico_graph_cached.load_csuchico_graph"""
+        # Same nodes, labels and edges as the generated Python module
+        payload = {
+            'start_url': self.start_url,
+            'nodes': [(node, self.url_to_label.get(node, node)) for node in self.graph.nodes()],
+            'edges': list(self.graph.edges()),
+        }
+        with gzip.open(output_file, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        print(f"✓ Saved graph to {output_file}")
+
 
 def main():
     scraper = CSUChicoScraper(
@@ -304,10 +402,14 @@ def main():
 
     scraper.scrape()
     scraper.save_as_python_file("csuchico_graph.py")
+    scraper.save_as_pickle("csuchico_graph.pkl.gz")
 
     print("\n✓ Done! Import the graph with:")
     print("  from csuchico_graph import create_csuchico_graph")
     print("  G = create_csuchico_graph()")
+    print("or load the faster binary copy with:")
+    print("  from csuchico_graph_cached import load_csuchico_graph")
+    print("  G = load_csuchico_graph()")
 
 
 if __name__ == "__main__":
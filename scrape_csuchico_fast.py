@@ -8,17 +8,36 @@ CSU Chico Website Scraper - FAST VERSION
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml.etree import ParserError
+from lxml.html import soupparser
 from urllib.parse import urljoin, urlparse
 import networkx as nx
 import time
+from array import array
 from collections import deque, defaultdict
+from functools import lru_cache
+import gzip
+import pickle
 import sys
 import signal
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import threading
 from datetime import datetime, timedelta
 
+from scrape_common import (
+    ALLOWED_NETLOCS,
+    HTML_CONTENT_TYPES,
+    NAV_HREFS_XPATH,
+    SKIP_EXTENSIONS,
+    USER_AGENT,
+    html_parser,
+    load_robots,
+    split_site_url,
+)
+
 
 class CSUChicoScraperFast:
     def __init__(self, start_url="https://www.csuchico.edu", max_depth=6, delay=0.5, workers=4):
@@ -27,19 +46,55 @@ class CSUChicoScraperFast:
         self.delay = delay
         self.workers = workers
 
+        # HTTP session: one keep-alive connection pool shared by all workers
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        })
+        # Retry transient failures (connection errors, 429/5xx) with
+        # exponential backoff, honouring any Retry-After the server sends
+        retry = Retry(
+            total=3,
+            backoff_factor=1.0,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=workers,
+            pool_maxsize=workers * 2,
+            max_retries=retry,
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
         # Graph structure
         self.graph = nx.DiGraph()
         self.graph_lock = threading.Lock()
 
-        # Tracking
-        self.visited_urls = set()
+        # Tracking: each URL is interned to an integer id when first seen.
+        # The BFS queue holds ids; per-URL crawl state lives in parallel
+        # arrays, appended only under visited_lock.
+        self.visited_urls = {}  # Maps URLs to their ids
+        self.urls = []  # Maps ids back to URLs
+        self.url_depths = array('H')  # Depth at which each URL was discovered
+        self.url_parents = array('i')  # Id of the discovering page, -1 for none
         self.visited_lock = threading.Lock()
         self.url_to_label = {}
         self.nav_footer_links = set()
 
-        # Statistics
+        # Politeness: across all workers, requests start at most once every
+        # delay / workers seconds
+        self.request_interval = delay / workers
+        self.next_request_time = 0.0
+        self.rate_lock = threading.Lock()
+
+        # Parsed robots.txt, fetched once when the crawl starts
+        self.robots = None
+
+        # Statistics (only updated by the main thread as results come in)
         self.stats_by_depth = defaultdict(lambda: {"pages": 0, "links": 0})
-        self.stats_lock = threading.Lock()
         self.total_pages_scraped = 0
         self.start_time = None
 
@@ -55,49 +110,65 @@ class CSUChicoScraperFast:
             print("Please wait while we save the graph...")
             self.shutdown_requested = True
 
-    def is_valid_csuchico_url(self, url):
+    def _wait_for_request_slot(self):
+        """Block until the shared rate limiter lets this worker send a request"""
+        with self.rate_lock:
+            now = time.monotonic()
+            slot = max(now, self.next_request_time)
+            self.next_request_time = slot + self.request_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    @staticmethod
+    @lru_cache(maxsize=200_000)
+    def is_valid_csuchico_url(url):
         """Check if URL is a valid CSU Chico page"""
-        parsed = urlparse(url)
+        parts = split_site_url(url)
+        if parts is not None:
+            return not parts[1].lower().endswith(SKIP_EXTENSIONS)
 
-        if not parsed.netloc.endswith('csuchico.edu'):
+        if url.startswith(('mailto:', 'tel:')):
             return False
 
-        if parsed.netloc not in ['www.csuchico.edu', 'csuchico.edu']:
-            return False
+        parsed = urlparse(url)
 
-        skip_extensions = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.zip',
-                          '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
-                          '.mp4', '.mp3', '.avi', '.mov', '.css', '.js')
-        if any(parsed.path.lower().endswith(ext) for ext in skip_extensions):
+        if parsed.netloc not in ALLOWED_NETLOCS:
             return False
 
-        if parsed.scheme in ['mailto', 'tel']:
+        if parsed.path.lower().endswith(SKIP_EXTENSIONS):
             return False
 
         return True
 
-    def normalize_url(self, url):
+    @staticmethod
+    @lru_cache(maxsize=200_000)
+    def normalize_url(url):
         """Normalize URL by removing fragments and trailing slashes"""
-        parsed = urlparse(url)
-        normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-        if normalized.endswith('/') and len(parsed.path) > 1:
+        parts = split_site_url(url)
+        if parts is None:
+            parsed = urlparse(url)
+            parts = (f"{parsed.scheme}://{parsed.netloc}", parsed.path, parsed.query)
+        origin, path, query = parts
+        normalized = origin + path
+        if normalized.endswith('/') and len(path) > 1:
             normalized = normalized[:-1]
-        if parsed.query:
-            normalized += f"?{parsed.query}"
+        if query:
+            normalized += f"?{query}"
         return normalized
 
-    def get_page_title(self, soup, url):
+    def get_page_title(self, tree, url):
         """Extract a meaningful title from the page"""
-        if soup.title and soup.title.string:
-            title = soup.title.string.strip()
+        title_el = tree.find('.//title')
+        if title_el is not None and title_el.text:
+            title = title_el.text.strip()
             title = title.replace(' | CSU Chico', '')
             title = title.replace(' - CSU Chico', '')
             title = title.replace('CSU, Chico - ', '')
             return title[:100]
 
-        h1 = soup.find('h1')
-        if h1:
-            return h1.get_text().strip()[:100]
+        h1 = tree.find('.//h1')
+        if h1 is not None:
+            return h1.text_content().strip()[:100]
 
         path = urlparse(url).path
         if path and path != '/':
@@ -105,133 +176,180 @@ class CSUChicoScraperFast:
 
         return "CSU Chico Home"
 
-    def extract_links(self, soup, base_url, is_homepage=False):
-        """Extract all valid links from the page"""
-        links = []
+    def extract_links(self, tree, base_url, is_homepage=False):
+        """
+        Yield (url, text) for each valid link on the page, skipping nav/footer
+        links already crawled from the homepage
+        """
+        nav_footer_links = self.nav_footer_links
+        visited_urls = self.visited_urls
 
         if is_homepage:
-            nav_elements = soup.find_all(['nav', 'header', 'footer'])
-            for element in nav_elements:
-                for a_tag in element.find_all('a', href=True):
-                    href = a_tag['href']
-                    full_url = urljoin(base_url, href)
-                    normalized = self.normalize_url(full_url)
-                    if self.is_valid_csuchico_url(normalized):
-                        self.nav_footer_links.add(normalized)
-
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
-            full_url = urljoin(base_url, href)
-            normalized = self.normalize_url(full_url)
+            for href in tree.xpath(NAV_HREFS_XPATH, smart_strings=False):
+                normalized = self.normalize_url(urljoin(base_url, href))
+                if self.is_valid_csuchico_url(normalized):
+                    self.nav_footer_links.add(normalized)
+
+        for a_tag in tree.xpath('//a[@href]'):
+            normalized = self.normalize_url(urljoin(base_url, a_tag.get('href')))
 
             if not self.is_valid_csuchico_url(normalized):
                 continue
+            if not is_homepage and normalized in nav_footer_links and normalized in visited_urls:
+                continue
 
-            link_text = a_tag.get_text().strip()
+            link_text = a_tag.text_content().strip()
             if not link_text:
                 link_text = a_tag.get('title', '')
 
-            links.append((normalized, link_text))
-
-        return links
+            yield normalized, link_text
 
     def fetch_page(self, url):
         """Fetch and parse a page"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Educational Research Project)',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            }
-            response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-            response.raise_for_status()
-
-            if not self.is_valid_csuchico_url(response.url):
-                return None, None
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-            return soup, response.url
+            # Stream so the body is only downloaded once we know it is HTML
+            with self.session.get(url, timeout=10, allow_redirects=True, stream=True) as response:
+                response.raise_for_status()
+
+                if not self.is_valid_csuchico_url(response.url):
+                    return None, None
+
+                content_type = response.headers.get('Content-Type', '')
+                mime_type = content_type.partition(';')[0].strip().lower()
+                if mime_type and mime_type not in HTML_CONTENT_TYPES:
+                    return None, None
+
+                # Read the body in one call instead of through .content's chunk buffer
+                content = response.raw.read(decode_content=True)
+
+            try:
+                tree = lxml.html.document_fromstring(
+                    content, parser=html_parser(content_type, content)
+                )
+            except ParserError:
+                # libxml2 gives up on some degenerate documents; let
+                # BeautifulSoup build the tree instead
+                tree = soupparser.fromstring(content)
+            return tree, response.url
 
         except Exception as e:
             print(f"  ✗ Error: {url[:60]} - {str(e)[:50]}", file=sys.stderr)
             return None, None
 
-    def process_page(self, current_url, depth, parent_url):
-        """Process a single page (thread-safe)"""
+    def _load_robots(self):
+        """Fetch robots.txt once and adopt its rules and Crawl-delay"""
+        self.robots = load_robots(self.session, self.start_url)
+
+        crawl_delay = self.robots.crawl_delay(USER_AGENT)
+        if crawl_delay is not None and float(crawl_delay) > self.request_interval:
+            self.request_interval = float(crawl_delay)
+            print(f"🤖 robots.txt Crawl-delay: {self.request_interval}s between requests")
+
+    def is_allowed_by_robots(self, url):
+        """Check a URL against robots.txt before it is queued"""
+        return self.robots is None or self.robots.can_fetch(USER_AGENT, url)
+
+    def _mark_visited(self, url, depth, parent_id=-1):
+        """Intern a newly seen URL and return its id (caller holds visited_lock)"""
+        url_id = len(self.urls)
+        self.visited_urls[url] = url_id
+        self.urls.append(url)
+        self.url_depths.append(depth)
+        self.url_parents.append(parent_id)
+        return url_id
+
+    def process_page(self, page_id):
+        """
+        Process a single page (thread-safe), returning ids of newly found URLs,
+        or None if the page was skipped
+        """
         if self.shutdown_requested:
-            return []
+            return None
 
-        soup, final_url = self.fetch_page(current_url)
-        if soup is None:
-            return []
+        current_url = self.urls[page_id]
+        depth = self.url_depths[page_id]
+        parent_id = self.url_parents[page_id]
+
+        self._wait_for_request_slot()
+        tree, final_url = self.fetch_page(current_url)
+        if tree is None:
+            return None
 
         # Update URL if redirected
         if final_url and final_url != current_url:
             current_url = self.normalize_url(final_url)
             with self.visited_lock:
                 if current_url in self.visited_urls:
-                    return []
-                self.visited_urls.add(current_url)
+                    return None
+                self._mark_visited(current_url, depth, parent_id)
 
         # Get page title
-        title = self.get_page_title(soup, current_url)
+        title = self.get_page_title(tree, current_url)
 
         with self.graph_lock:
             self.url_to_label[current_url] = title
             self.graph.add_node(current_url, label=title, depth=depth)
-            if parent_url:
-                self.graph.add_edge(parent_url, current_url)
-
-        # Extract links
-        is_homepage = (depth == 0)
-        links = self.extract_links(soup, current_url, is_homepage)
-
-        # Filter links if not homepage
-        if not is_homepage:
-            links = [(url, text) for url, text in links
-                    if url not in self.nav_footer_links or url not in self.visited_urls]
+            if parent_id >= 0:
+                self.graph.add_edge(self.urls[parent_id], current_url)
+
+        # Split off links that are already interned without taking the lock:
+        # URLs are never removed from visited_urls, so a hit here stays a hit.
+        # Only the remaining candidates are re-checked under visited_lock.
+        visited_urls = self.visited_urls
+        seen_links = []
+        candidates = []
+        for link_url, link_text in self.extract_links(tree, current_url, depth == 0):
+            if link_url in visited_urls:
+                seen_links.append(link_url)
+            else:
+                candidates.append((link_url, link_text, self.is_allowed_by_robots(link_url)))
 
         # Prepare new links for queue
         new_links = []
-        with self.visited_lock:
-            for link_url, link_text in links:
-                if link_url not in self.visited_urls:
-                    self.visited_urls.add(link_url)
-                    new_links.append((link_url, link_text, depth + 1))
+        if candidates:
+            with self.visited_lock:
+                for link_url, link_text, allowed in candidates:
+                    if link_url in visited_urls:
+                        # Interned meanwhile by another worker (or earlier on this page)
+                        seen_links.append(link_url)
+                        continue
+
+                    link_id = self._mark_visited(link_url, depth + 1, page_id)
+                    if not allowed:
+                        # Remember it so later pages skip it too, but never fetch it
+                        continue
+                    new_links.append(link_id)
 
                     if link_url not in self.url_to_label and link_text:
                         self.url_to_label[link_url] = link_text[:100]
-                else:
-                    # Still add edge even if already visited
-                    with self.graph_lock:
-                        if link_url in self.graph:
-                            self.graph.add_edge(current_url, link_url)
-
-        # Update stats
-        with self.stats_lock:
-            self.stats_by_depth[depth]["pages"] += 1
-            self.stats_by_depth[depth]["links"] += len(new_links)
-            self.total_pages_scraped += 1
+
+        # Still add edges to already-visited pages, in one batch
+        if seen_links:
+            with self.graph_lock:
+                graph = self.graph
+                graph.add_edges_from(
+                    (current_url, link_url) for link_url in seen_links if link_url in graph
+                )
 
         return new_links
 
     def print_progress(self, depth, queue_size):
         """Print progress with time estimate"""
-        with self.stats_lock:
-            stats = self.stats_by_depth[depth]
-            elapsed = time.time() - self.start_time
+        stats = self.stats_by_depth[depth]
+        elapsed = time.time() - self.start_time
 
-            # Estimate time remaining
-            if self.total_pages_scraped > 0:
-                avg_time_per_page = elapsed / self.total_pages_scraped
-                est_remaining = avg_time_per_page * queue_size / self.workers
-                est_finish = datetime.now() + timedelta(seconds=est_remaining)
+        # Estimate time remaining
+        if self.total_pages_scraped > 0:
+            avg_time_per_page = elapsed / self.total_pages_scraped
+            est_remaining = avg_time_per_page * queue_size / self.workers
+            est_finish = datetime.now() + timedelta(seconds=est_remaining)
 
-                print(f"\r📊 D{depth}: {stats['pages']} pages | "
-                      f"{stats['links']} links | "
-                      f"Queue: {queue_size} | "
-                      f"Total: {self.total_pages_scraped} | "
-                      f"ETA: {est_finish.strftime('%H:%M:%S')}",
-                      end='', flush=True)
+            print(f"\r📊 D{depth}: {stats['pages']} pages | "
+                  f"{stats['links']} links | "
+                  f"Queue: {queue_size} | "
+                  f"Total: {self.total_pages_scraped} | "
+                  f"ETA: {est_finish.strftime('%H:%M:%S')}",
+                  end='', flush=True)
 
     def scrape(self):
         """Main scraping function using parallel BFS"""
@@ -241,55 +359,68 @@ class CSUChicoScraperFast:
         print("=" * 80)
 
         self.start_time = time.time()
+        self._load_robots()
+        if not self.is_allowed_by_robots(self.start_url):
+            raise RuntimeError(f"robots.txt disallows crawling {self.start_url}")
 
         # Initialize with homepage
         with self.visited_lock:
-            self.visited_urls.add(self.start_url)
+            start_id = self._mark_visited(self.start_url, 0)
 
-        queue = deque([(self.start_url, 0, None)])
+        queue = deque([start_id])
         current_depth = 0
 
-        with ThreadPoolExecutor(max_workers=self.workers) as executor:
-            while queue and not self.shutdown_requested:
-                # Check if we've moved to a new depth
-                if queue and queue[0][1] != current_depth:
-                    current_depth = queue[0][1]
-                    print(f"\n\n{'='*80}")
-                    print(f"📍 Starting Depth {current_depth}")
-                    print(f"{'='*80}")
-
-                if current_depth > self.max_depth:
-                    break
+        # Rolling window of submitted pages: as soon as any page finishes, its
+        # links are queued and the freed slot is refilled, so a single slow
+        # response never leaves the other workers idle. The window only waits
+        # to drain at depth boundaries, which keeps the crawl breadth-first.
+        in_flight = {}
+        max_in_flight = self.workers * 10
 
-                # Batch processing for current depth
-                batch_size = min(self.workers * 10, len(queue))
-                futures = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while (queue or in_flight) and not self.shutdown_requested:
+                while queue and len(in_flight) < max_in_flight:
+                    if self.shutdown_requested:
+                        break
 
-                for _ in range(batch_size):
-                    if not queue or self.shutdown_requested:
+                    # Finish the current depth before starting the next one
+                    if self.url_depths[queue[0]] > current_depth and in_flight:
                         break
 
-                    current_url, depth, parent_url = queue.popleft()
+                    url_id = queue.popleft()
+                    depth = self.url_depths[url_id]
 
                     if depth > self.max_depth:
                         continue
 
-                    future = executor.submit(self.process_page, current_url, depth, parent_url)
-                    futures[future] = (current_url, depth)
-                    time.sleep(self.delay / self.workers)  # Stagger starts
+                    # Check if we've moved to a new depth
+                    if depth > current_depth:
+                        current_depth = depth
+                        print(f"\n\n{'='*80}")
+                        print(f"📍 Starting Depth {current_depth}")
+                        print(f"{'='*80}")
 
-                # Collect results
-                for future in as_completed(futures):
-                    if self.shutdown_requested:
-                        break
+                    future = executor.submit(self.process_page, url_id)
+                    in_flight[future] = depth
 
+                if not in_flight:
+                    break
+
+                # Collect whatever has finished
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_depth = in_flight.pop(future)
                     new_links = future.result()
-                    for link_url, link_text, depth in new_links:
-                        queue.append((link_url, depth, futures[future][0]))
+                    if new_links is not None:
+                        stats = self.stats_by_depth[page_depth]
+                        stats["pages"] += 1
+                        stats["links"] += len(new_links)
+                        self.total_pages_scraped += 1
+                        queue.extend(new_links)
 
                     # Update progress display
                     if self.total_pages_scraped % 5 == 0:
-                        self.print_progress(futures[future][1], len(queue))
+                        self.print_progress(page_depth, len(queue))
 
         print("\n\n" + "=" * 80)
         if self.shutdown_requested:
@@ -320,7 +451,7 @@ class CSUChicoScraperFast:
         """Save graph as a Python file that can be imported"""
         print(f"\n💾 Saving graph to {output_file}...")
 
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
             f.write('"""\n')
             f.write('CSU Chico Website Graph\n')
             f.write(f'Scraped from {self.start_url}\n')
@@ -337,10 +468,11 @@ class CSUChicoScraperFast:
             # Add nodes with labels
             f.write('    # Add nodes with labels\n')
             f.write('    nodes = [\n')
+            node_lines = []
             for node in self.graph.nodes():
-                label = self.url_to_label.get(node, node)
-                label = label.replace("'", "\\'").replace("\n", " ")
-                f.write(f"        ('{node}', '{label}'),\n")
+                label = self.url_to_label.get(node, node).replace("\n", " ")
+                node_lines.append(f"        ({node!r}, {label!r}),\n")
+            f.writelines(node_lines)
             f.write('    ]\n')
             f.write('    for url, label in nodes:\n')
             f.write('        G.add_node(url, label=label)\n\n')
@@ -348,8 +480,10 @@ class CSUChicoScraperFast:
             # Add edges
             f.write('    # Add edges\n')
             f.write('    edges = [\n')
-            for source, target in self.graph.edges():
-                f.write(f"        ('{source}', '{target}'),\n")
+            f.writelines(
+                f"        ({source!r}, {target!r}),\n"
+                for source, target in self.graph.edges()
+            )
             f.write('    ]\n')
             f.write('    G.add_edges_from(edges)\n\n')
             f.write('    return G\n\n')
@@ -365,6 +499,25 @@ class CSUChicoScraperFast:
 
         print(f"✅ Saved graph to {output_file}")
 
+    def save_as_pickle(self, output_file="csuchico_graph.pkl.gz"):
+        """Save graph as a gzipped pickle, loadable with csuchico_graph_cached.load_csuchico_graph"""
+        print(f"\n💾 Saving graph to {output_file}...")
+
+        # Same nodes, labels and edges as the generated Python module
+        payload = {
+            'start_url': self.start_url,
+            'partial': self.shutdown_requested,
+            'nodes': [
+                (node, self.url_to_label.get(node, node).replace("\n", " "))
+                for node in self.graph.nodes()
+            ],
+            'edges': list(self.graph.edges()),
+        }
+        with gzip.open(output_file, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        print(f"✅ Saved graph to {output_file}")
+
 
 def main():
     scraper = CSUChicoScraperFast(
@@ -377,11 +530,17 @@ def main():
     try:
         scraper.scrape()
     finally:
-        # Always save, even if interrupted
-        scraper.save_as_python_file("csuchico_graph.py")
-        print("\n✅ Done! Import the graph with:")
-        print("  from csuchico_graph import create_csuchico_graph")
-        print("  G = create_csuchico_graph()")
+        # Always save, even if interrupted, unless nothing was crawled
+        # (e.g. robots.txt refused the start URL) and there is nothing to save
+        if scraper.urls:
+            scraper.save_as_python_file("csuchico_graph.py")
+            scraper.save_as_pickle("csuchico_graph.pkl.gz")
+            print("\n✅ Done! Import the graph with:")
+            print("  from csuchico_graph import create_csuchico_graph")
+            print("  G = create_csuchico_graph()")
+            print("or load the faster binary copy with:")
+            print("  from csuchico_graph_cached import load_csuchico_graph")
+            print("  G = load_csuchico_graph()")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
+# orjson rejects integers outside this range that json writes out in full
+_ORJSON_INT_MIN = -(2**63)
+_ORJSON_INT_MAX = 2**64 - 1
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse JSON; failures raise ``json.JSONDecodeError`` with or without orjson."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Compact UTF-8 encoded JSON, ready to bind as a BLOB.
+
+    Anything orjson refuses to serialize (e.g. integers wider than 64 bits) is
+    written by ``json`` instead. With orjson, NaN and infinities become
+    ``null`` and floats may be spelled differently (``1e16`` vs ``1e+16``).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _orjson_matches_json(obj: Any) -> bool:
+    """Whether orjson writes ``obj`` exactly as ``json`` would: no floats, no wide ints."""
+    if isinstance(obj, float):
+        return False
+    if isinstance(obj, int) and not isinstance(obj, bool):
+        return _ORJSON_INT_MIN <= obj <= _ORJSON_INT_MAX
+    if isinstance(obj, dict):
+        return all(
+            _orjson_matches_json(key) and _orjson_matches_json(value)
+            for key, value in obj.items()
+        )
+    if isinstance(obj, (list, tuple)):
+        return all(_orjson_matches_json(item) for item in obj)
+    return True
+
+
+def dumps_pretty(obj: Any) -> str:
+    """
+    Same output as ``json.dumps(obj, ensure_ascii=False, indent=2)``.
+
+    The text is hashed to version scaffolds, so orjson is only used when
+    ``obj`` has no floats or wide integers, whose spelling it does not match.
+    """
+    if orjson is not None and _orjson_matches_json(obj):
+        try:
+            return orjson.dumps(
+                obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2)
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import hashlib
-import json
 import sqlite3
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Iterator
+
+from . import json_compat
 
 DEFAULT_DB_PATH = Path("agent_history/ledger.db")
 
@@ -45,23 +49,83 @@ CREATE TABLE IF NOT EXISTS cycles (
     hops INTEGER,
     critique_state TEXT,
     critique_justification TEXT,
-    raw_response TEXT,
-    raw_critique TEXT,
+    raw_response BLOB,
+    raw_critique BLOB,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
+
+-- prompts.hash and scaffolds.hash are UNIQUE, so the lookups in
+-- _save_versioned already use those automatic indexes.
+CREATE INDEX IF NOT EXISTS idx_cycles_cycle_persona ON cycles (cycle, persona);
+CREATE INDEX IF NOT EXISTS idx_cycles_task ON cycles (task_id);
 """
 
+# Per-connection settings: in WAL mode NORMAL only syncs at checkpoints, so
+# each commit is an append to the log rather than a full fsync.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA busy_timeout=3000",
+)
+
+
+def _is_memory_db(path: Path | str) -> bool:
+    return str(path) == ":memory:"
+
+
+# One autocommit connection per database path, opened on first use and shared
+# by every thread; _write_lock serializes the transactions run on them.
+_connections: Dict[str, sqlite3.Connection] = {}
+_connections_lock = threading.Lock()
+_write_lock = threading.RLock()
+
+
+def _get_conn(path: Path | str) -> sqlite3.Connection:
+    key = str(path)
+    with _connections_lock:
+        conn = _connections.get(key)
+        if conn is None:
+            conn = sqlite3.connect(
+                path if _is_memory_db(path) else Path(path),
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            _connections[key] = conn
+    return conn
+
+
+@contextmanager
+def _transaction(path: Path | str) -> Iterator[sqlite3.Connection]:
+    conn = _get_conn(path)
+    with _write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
 
 def init_db(path: Path | str = DEFAULT_DB_PATH) -> None:
-    db_path = Path(path)
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(db_path) as conn:
+    if not _is_memory_db(path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = _get_conn(path)
+    with _write_lock:
+        if not _is_memory_db(path):
+            # journal_mode is stored in the database file, so connections
+            # opened later by other processes use WAL as well
+            conn.execute("PRAGMA journal_mode=WAL")
         conn.executescript(SCHEMA)
 
 
 def _save_versioned(table: str, body: str, path: Path | str = DEFAULT_DB_PATH) -> int:
     digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
-    with sqlite3.connect(Path(path)) as conn:
+    with _transaction(path) as conn:
         cursor = conn.execute(f"SELECT id FROM {table} WHERE hash = ?", (digest,))
         row = cursor.fetchone()
         if row:
@@ -70,16 +134,23 @@ def _save_versioned(table: str, body: str, path: Path | str = DEFAULT_DB_PATH) -
             f"INSERT INTO {table} (hash, body) VALUES (?, ?)",
             (digest, body),
         )
-        conn.commit()
         return cursor.lastrowid
 
 
+# Rows in the versioned tables are never updated or deleted, so the id for a
+# given body stays valid for the life of the process; unchanged prompts and
+# scaffolds skip the hash and the SELECT on every later save.
+@lru_cache(maxsize=128)
+def _saved_version_id(table: str, body: str, path: str) -> int:
+    return _save_versioned(table, body, path)
+
+
 def save_prompt(body: str, path: Path | str = DEFAULT_DB_PATH) -> int:
-    return _save_versioned("prompts", body, path)
+    return _saved_version_id("prompts", body, str(path))
 
 
 def save_scaffold(body: str, path: Path | str = DEFAULT_DB_PATH) -> int:
-    return _save_versioned("scaffolds", body, path)
+    return _saved_version_id("scaffolds", body, str(path))
 
 
 @dataclass
@@ -107,56 +178,66 @@ class TaskLog:
     raw_critique: Dict[str, Any]
 
 
+_INSERT_CYCLE = """
+INSERT INTO cycles (
+    cycle,
+    task_id,
+    persona,
+    success,
+    expected_url,
+    predicted_url,
+    prompt_id,
+    scaffold_id,
+    subagent_tokens_in,
+    subagent_tokens_out,
+    subagent_cost,
+    critique_tokens_in,
+    critique_tokens_out,
+    critique_cost,
+    total_cost,
+    wall_time_ms,
+    hops,
+    critique_state,
+    critique_justification,
+    raw_response,
+    raw_critique
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _task_row(task_log: TaskLog) -> tuple:
+    return (
+        task_log.cycle,
+        task_log.task_id,
+        task_log.persona,
+        int(task_log.success),
+        task_log.expected_url,
+        task_log.predicted_url,
+        task_log.prompt_id,
+        task_log.scaffold_id,
+        task_log.subagent_tokens_in,
+        task_log.subagent_tokens_out,
+        task_log.subagent_cost,
+        task_log.critique_tokens_in,
+        task_log.critique_tokens_out,
+        task_log.critique_cost,
+        task_log.total_cost,
+        task_log.wall_time_ms,
+        task_log.hops,
+        task_log.critique_state,
+        task_log.critique_justification,
+        json_compat.dumps(task_log.raw_response),
+        json_compat.dumps(task_log.raw_critique),
+    )
+
+
+def log_tasks(task_logs: Iterable[TaskLog], path: Path | str = DEFAULT_DB_PATH) -> None:
+    rows = [_task_row(task_log) for task_log in task_logs]
+    if not rows:
+        return
+    with _transaction(path) as conn:
+        conn.executemany(_INSERT_CYCLE, rows)
+
+
 def log_task(task_log: TaskLog, path: Path | str = DEFAULT_DB_PATH) -> None:
-    with sqlite3.connect(Path(path)) as conn:
-        conn.execute(
-            """
-            INSERT INTO cycles (
-                cycle,
-                task_id,
-                persona,
-                success,
-                expected_url,
-                predicted_url,
-                prompt_id,
-                scaffold_id,
-                subagent_tokens_in,
-                subagent_tokens_out,
-                subagent_cost,
-                critique_tokens_in,
-                critique_tokens_out,
-                critique_cost,
-                total_cost,
-                wall_time_ms,
-                hops,
-                critique_state,
-                critique_justification,
-                raw_response,
-                raw_critique
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                task_log.cycle,
-                task_log.task_id,
-                task_log.persona,
-                int(task_log.success),
-                task_log.expected_url,
-                task_log.predicted_url,
-                task_log.prompt_id,
-                task_log.scaffold_id,
-                task_log.subagent_tokens_in,
-                task_log.subagent_tokens_out,
-                task_log.subagent_cost,
-                task_log.critique_tokens_in,
-                task_log.critique_tokens_out,
-                task_log.critique_cost,
-                task_log.total_cost,
-                task_log.wall_time_ms,
-                task_log.hops,
-                task_log.critique_state,
-                task_log.critique_justification,
-                json.dumps(task_log.raw_response),
-                json.dumps(task_log.raw_critique),
-            ),
-        )
-        conn.commit()
+    log_tasks((task_log,), path)
@@ -3,10 +3,15 @@ from __future__ import annotations
 import json
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import json_compat
 
 
 class ClaudeError(RuntimeError):
@@ -19,6 +24,42 @@ class ClaudeResponse:
     raw: Dict
 
 
+def _build_session() -> requests.Session:
+    # One keep-alive pool shared by every call (and by run_cycle's worker
+    # threads), so only the first request to the API pays the TCP/TLS
+    # handshake. Retries cover connection failures; a POST that reached the
+    # server is never resent.
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.2),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_SESSION = _build_session()
+
+
+def strip_fence(text: str) -> str:
+    raw = text.strip()
+    if raw.startswith("```"):
+        lines = raw.splitlines()
+        if lines and lines[0].startswith("```"):
+            lines = lines[1:]
+        if lines and lines[0].lower().startswith("json"):
+            lines = lines[1:]
+        if lines and lines[-1].startswith("```"):
+            lines = lines[:-1]
+        raw = "\n".join(lines).strip()
+    return raw
+
+
+# Credentials are resolved once per process. A missing token raises and is
+# not cached, so fixing the configuration and retrying still works.
+@lru_cache(maxsize=1)
 def _load_credentials() -> tuple[str, str]:
     base_url = os.getenv("ANTHROPIC_BASE_URL")
     token = os.getenv("ANTHROPIC_AUTH_TOKEN") or os.getenv("ANTHROPIC_API_KEY")
@@ -69,7 +110,7 @@ def call_claude(
         "messages": messages,
     }
 
-    response = requests.post(
+    response = _SESSION.post(
         f"{base_url}/v1/messages",
         headers=headers,
         json=payload,
@@ -79,7 +120,7 @@ def call_claude(
     if response.status_code >= 400:
         raise ClaudeError(f"Claude API error {response.status_code}: {response.text}")
 
-    data = response.json()
+    data = json_compat.loads(response.content)
     parts = data.get("content", [])
     text = "".join(part.get("text", "") for part in parts if part.get("type") == "text").strip()
     return ClaudeResponse(text=text, raw=data)
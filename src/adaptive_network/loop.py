@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping
+from typing import Dict, Iterable, List, Mapping, NamedTuple
 
-from . import ledger
+from . import json_compat, ledger
 from .ledger import TaskLog
 from .llm import call_claude
 from .main_agent import load_main_prompt, plan_task
@@ -28,142 +30,193 @@ def _compute_cost(input_tokens: int, cached_tokens: int, output_tokens: int) ->
     )
 
 
-def extract_usage(raw: Mapping[str, object]) -> Dict[str, float | int]:
+class Usage(NamedTuple):
+    input_tokens: int
+    output_tokens: int
+    cache_tokens: int
+    cost: float
+    duration_ms: int | None
+
+
+def extract_usage(raw: Mapping[str, object]) -> Usage:
     usage = raw.get("usage") if isinstance(raw, Mapping) else None
     if not isinstance(usage, Mapping):
-        return {
-            "input_tokens": 0,
-            "output_tokens": 0,
-            "cache_tokens": 0,
-            "cost": 0.0,
-            "duration_ms": raw.get("duration_api_ms") if isinstance(raw, Mapping) else None,
-        }
+        return Usage(
+            input_tokens=0,
+            output_tokens=0,
+            cache_tokens=0,
+            cost=0.0,
+            duration_ms=raw.get("duration_api_ms") if isinstance(raw, Mapping) else None,
+        )
 
     input_tokens = usage.get("input_tokens") or 0
     output_tokens = usage.get("output_tokens") or 0
     cache_tokens = usage.get("cache_read_input_tokens") or 0
 
-    return {
-        "input_tokens": input_tokens,
-        "output_tokens": output_tokens,
-        "cache_tokens": cache_tokens,
-        "cost": _compute_cost(input_tokens, cache_tokens, output_tokens),
-        "duration_ms": raw.get("duration_api_ms"),
-    }
+    return Usage(
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cache_tokens=cache_tokens,
+        cost=_compute_cost(input_tokens, cache_tokens, output_tokens),
+        duration_ms=raw.get("duration_api_ms"),
+    )
 
 
-def print_task_header(cycle: int, task: Task) -> None:
-    print(f"\n=== Cycle {cycle} :: Task {task.id} ({task.persona}) ===")
-    print(task.query)
+def format_task_header(cycle: int, task: Task) -> str:
+    return f"\n=== Cycle {cycle} :: Task {task.id} ({task.persona}) ===\n{task.query}"
 
 
 def build_scaffolding() -> Dict[str, List[Dict[str, str]]]:
     return {persona: get_persona_context(persona) for persona in PERSONA_CONFIG}
 
 
+# Tasks run concurrently; each one prints its report in a single block.
+_print_lock = threading.Lock()
+
+
+def _run_task(
+    *,
+    cycle: int,
+    task: Task,
+    main_prompt: str,
+    context: List[Dict[str, str]],
+    prompt_id: int,
+    scaffold_id: int,
+) -> TaskLog:
+    report = [format_task_header(cycle, task)]
+
+    brief_payload = plan_task(
+        persona=task.persona,
+        query=task.query,
+        context=context,
+        system_prompt=main_prompt,
+    )
+    task_brief = brief_payload.get("task_brief", "").strip()
+    notes = brief_payload.get("notes", "")
+    if task_brief:
+        report.append(f"[Main brief] {task_brief}")
+    if notes:
+        report.append(f"[Main notes] {notes}")
+
+    augmented_query = (
+        f"{task_brief}\n\nOriginal request: {task.query}" if task_brief else task.query
+    )
+
+    t_start = time.time()
+    sub_payload, sub_raw, critique_payload, critique_raw = run_subagent(
+        persona=task.persona,
+        query=augmented_query,
+        expected_url=task.expected_url,
+        context=context,
+    )
+    elapsed_ms = int((time.time() - t_start) * 1000)
+
+    sub_metrics = extract_usage(sub_raw)
+    crit_metrics = extract_usage(critique_raw)
+
+    chosen_url = sub_payload.get("chosen_url")
+    critique_state = critique_payload.get("state")
+    final_url = critique_payload.get("revised_url") or chosen_url
+
+    success = bool(final_url and task.expected_url in final_url)
+    if critique_state == "fail":
+        success = False
+    elif critique_state == "retry" and final_url and task.expected_url in final_url:
+        success = True
+
+    # extract_usage always reports cost as a float (0.0 without usage data)
+    task_cost = sub_metrics.cost + crit_metrics.cost
+
+    report.append(f"[Subagent] URL={chosen_url} confidence={sub_payload.get('confidence')}")
+    report.append(f"[Critique] state={critique_state} -> final_url={final_url}")
+    report.append(
+        f"[Metrics] success={success} | tokens_in={sub_metrics.input_tokens} "
+        f"| tokens_out={sub_metrics.output_tokens} | cost=${task_cost:.4f} "
+        f"| elapsed={elapsed_ms}ms"
+    )
+    with _print_lock:
+        print("\n".join(report))
+
+    return TaskLog(
+        cycle=cycle,
+        task_id=task.id,
+        persona=task.persona,
+        success=success,
+        expected_url=task.expected_url,
+        predicted_url=final_url,
+        prompt_id=prompt_id,
+        scaffold_id=scaffold_id,
+        subagent_tokens_in=sub_metrics.input_tokens,
+        subagent_tokens_out=sub_metrics.output_tokens,
+        subagent_cost=sub_metrics.cost,
+        critique_tokens_in=crit_metrics.input_tokens,
+        critique_tokens_out=crit_metrics.output_tokens,
+        critique_cost=crit_metrics.cost,
+        total_cost=task_cost,
+        wall_time_ms=elapsed_ms,
+        hops=2,
+        critique_state=critique_state,
+        critique_justification=critique_payload.get("justification"),
+        raw_response=sub_raw,
+        raw_critique=critique_raw,
+    )
+
+
 def run_cycle(
     *,
     cycle: int,
     tasks: Iterable[Task],
     main_prompt: str,
     scaffolding: Dict[str, List[Dict[str, str]]],
+    max_workers: int = 8,
+    prompt_id: int | None = None,
+    scaffold_id: int | None = None,
 ) -> Dict[str, float]:
     task_list = list(tasks)
-    prompt_id = ledger.save_prompt(main_prompt)
-    scaffold_body = json.dumps(scaffolding, ensure_ascii=False, indent=2)
-    scaffold_id = ledger.save_scaffold(scaffold_body)
-
-    successes = 0
-    total_cost = 0.0
-
-    for task in task_list:
-        print_task_header(cycle, task)
-        context = scaffolding[task.persona]
-
-        brief_payload = plan_task(
-            persona=task.persona,
-            query=task.query,
-            context=context,
-            system_prompt=main_prompt,
-        )
-        task_brief = brief_payload.get("task_brief", "").strip()
-        notes = brief_payload.get("notes", "")
-        if task_brief:
-            print(f"[Main brief] {task_brief}")
-        if notes:
-            print(f"[Main notes] {notes}")
-
-        augmented_query = (
-            f"{task_brief}\n\nOriginal request: {task.query}" if task_brief else task.query
-        )
-
-        t_start = time.time()
-        sub_payload, sub_raw, critique_payload, critique_raw = run_subagent(
-            persona=task.persona,
-            query=augmented_query,
-            expected_url=task.expected_url,
-            context=context,
-        )
-        elapsed_ms = int((time.time() - t_start) * 1000)
-
-        sub_metrics = extract_usage(sub_raw)
-        crit_metrics = extract_usage(critique_raw)
-
-        chosen_url = sub_payload.get("chosen_url")
-        critique_state = critique_payload.get("state")
-        final_url = critique_payload.get("revised_url") or chosen_url
-
-        success = bool(final_url and task.expected_url in final_url)
-        if critique_state == "fail":
-            success = False
-        elif critique_state == "retry" and final_url and task.expected_url in final_url:
-            success = True
-
-        if success:
-            successes += 1
-
-        cost_components = [
-            component
-            for component in (sub_metrics.get("cost"), crit_metrics.get("cost"))
-            if component is not None
-        ]
-        task_cost = float(sum(cost_components))
-        total_cost += task_cost
-
-        print(f"[Subagent] URL={chosen_url} confidence={sub_payload.get('confidence')}")
-        print(f"[Critique] state={critique_state} -> final_url={final_url}")
-        print(
-            f"[Metrics] success={success} | tokens_in={sub_metrics.get('input_tokens')} "
-            f"| tokens_out={sub_metrics.get('output_tokens')} | cost=${task_cost:.4f} "
-            f"| elapsed={elapsed_ms}ms"
-        )
-
-        ledger.log_task(
-            TaskLog(
+    # Callers running several cycles pass the ids in, so unchanged prompts and
+    # scaffolding are not re-serialized and re-saved every cycle.
+    if prompt_id is None:
+        prompt_id = ledger.save_prompt(main_prompt)
+    if scaffold_id is None:
+        scaffold_id = ledger.save_scaffold(json_compat.dumps_pretty(scaffolding))
+
+    # Tasks are independent and spend almost all their time waiting on the
+    # LLM, so they run in a thread pool. Logs keep task order and are written
+    # in one transaction once the pool is done (or interrupted).
+    task_logs: List[TaskLog | None] = [None] * len(task_list)
+    errors: List[Exception] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                _run_task,
                 cycle=cycle,
-                task_id=task.id,
-                persona=task.persona,
-                success=success,
-                expected_url=task.expected_url,
-                predicted_url=final_url,
+                task=task,
+                main_prompt=main_prompt,
+                context=scaffolding[task.persona],
                 prompt_id=prompt_id,
                 scaffold_id=scaffold_id,
-                subagent_tokens_in=sub_metrics.get("input_tokens"),
-                subagent_tokens_out=sub_metrics.get("output_tokens"),
-                subagent_cost=sub_metrics.get("cost"),
-                critique_tokens_in=crit_metrics.get("input_tokens"),
-                critique_tokens_out=crit_metrics.get("output_tokens"),
-                critique_cost=crit_metrics.get("cost"),
-                total_cost=task_cost,
-                wall_time_ms=elapsed_ms,
-                hops=2,
-                critique_state=critique_state,
-                critique_justification=critique_payload.get("justification"),
-                raw_response=sub_raw,
-                raw_critique=critique_raw,
-            )
-        )
-
+            ): idx
+            for idx, task in enumerate(task_list)
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    task_logs[futures[future]] = future.result()
+                except Exception as exc:
+                    errors.append(exc)
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            completed = [task_log for task_log in task_logs if task_log is not None]
+            ledger.log_tasks(completed)
+
+    # Other tasks were still allowed to finish and be logged first
+    if errors:
+        raise errors[0]
+
+    successes = sum(task_log.success for task_log in completed)
+    total_cost = sum((task_log.total_cost for task_log in completed), 0.0)
     print(f"\nCycle {cycle} complete :: {successes}/{len(task_list)} successes | cost=${total_cost:.4f}")
     return {"successes": successes, "total_cost": total_cost, "tasks": len(task_list)}
 
@@ -187,7 +240,7 @@ def maybe_update_prompt(current_prompt: str, cycle_results: Dict[str, float]) ->
     )
     response = call_claude(prompt)
     try:
-        payload = json.loads(response.text)
+        payload = json_compat.loads(response.text)
         new_prompt = payload.get("prompt")
         if new_prompt:
             timestamped = Path("agent_history/prompts")
@@ -207,6 +260,8 @@ def main(cycles: int = 1) -> None:
     tasks = load_tasks()
     main_prompt = load_main_prompt()
     scaffolding = build_scaffolding()
+    scaffold_id = ledger.save_scaffold(json_compat.dumps_pretty(scaffolding))
+    prompt_id = ledger.save_prompt(main_prompt)
 
     for cycle in range(1, cycles + 1):
         results = run_cycle(
@@ -214,5 +269,10 @@ def main(cycles: int = 1) -> None:
             tasks=tasks,
             main_prompt=main_prompt,
             scaffolding=scaffolding,
+            prompt_id=prompt_id,
+            scaffold_id=scaffold_id,
         )
-        main_prompt = maybe_update_prompt(main_prompt, results)
+        new_prompt = maybe_update_prompt(main_prompt, results)
+        if new_prompt != main_prompt:
+            main_prompt = new_prompt
+            prompt_id = ledger.save_prompt(main_prompt)
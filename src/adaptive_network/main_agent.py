@@ -1,18 +1,27 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from importlib import resources
 from pathlib import Path
 from typing import Iterable, Mapping
 
-from .llm import call_claude
+from . import json_compat
+from .llm import call_claude, strip_fence
+
+
+# Packaged templates never change at runtime; override files are re-read so
+# edits to them still take effect.
+@lru_cache(maxsize=None)
+def _packaged_prompt_text(default_package: str, resource_name: str) -> str:
+    resource = resources.files(default_package).joinpath(resource_name)
+    return resource.read_text(encoding="utf-8")
 
 
 def _read_prompt_text(default_package: str, resource_name: str, override: Path | None) -> str:
     if override is not None:
         return override.read_text(encoding="utf-8")
-    resource = resources.files(default_package).joinpath(resource_name)
-    return resource.read_text(encoding="utf-8")
+    return _packaged_prompt_text(default_package, resource_name)
 
 
 def load_main_prompt(path: Path | None = None) -> str:
@@ -38,19 +47,10 @@ Context pages:
 {context_lines}
 """
     response = call_claude(prompt)
-    raw_text = response.text.strip()
-    if raw_text.startswith("```"):
-        lines = raw_text.splitlines()
-        if lines and lines[0].startswith("```"):
-            lines = lines[1:]
-        if lines and lines and lines[0].lower().startswith("json"):
-            lines = lines[1:]
-        if lines and lines[-1].startswith("```"):
-            lines = lines[:-1]
-        raw_text = "\n".join(lines).strip()
+    raw_text = strip_fence(response.text)
 
     try:
-        payload = json.loads(raw_text)
+        payload = json_compat.loads(raw_text)
     except json.JSONDecodeError:
         payload = {"task_brief": "", "notes": raw_text}
     if "task_brief" not in payload:
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import pickle
+from dataclasses import dataclass
 from functools import lru_cache
-from typing import Dict, List
-from urllib.parse import urlparse
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
 
+import networkx as nx
+
+import csuchico_graph_cached
+import csuchico_graph_refined
+from csuchico_graph_cached import GRAPH_MODULE, GRAPH_PICKLE
 from csuchico_graph_refined import create_csuchico_graph_refined
 
+REFINED_GRAPH_CACHE = Path("agent_history/graph_refined.pkl")
+
 PERSONA_PREFIXES: Dict[str, List[str]] = {
     "computer_science": [
         "/academics/college/engineering/departments/computer-science",
@@ -26,18 +35,80 @@ PERSONA_PREFIXES: Dict[str, List[str]] = {
 GLOBAL_SUPPORT_PREFIXES = ("/admissions", "/apply", "/cost-aid")
 
 
+def _prefix_tuple(prefixes: Iterable[str]) -> Tuple[str, ...]:
+    """Strip trailing slashes into a tuple for ``str.startswith``."""
+    return tuple(prefix.rstrip("/") for prefix in prefixes)
+
+
+_PERSONA_PREFIXES = {
+    persona: _prefix_tuple(prefixes) for persona, prefixes in PERSONA_PREFIXES.items()
+}
+_SUPPORT_PREFIXES = _prefix_tuple(GLOBAL_SUPPORT_PREFIXES)
+
+
 def _normalize_path(url: str) -> str:
-    return urlparse(url).path.lower().rstrip('/') or '/'
+    # Slice the path directly; urlparse builds a full 6-tuple we never use.
+    parts = url.split("/", 3)
+    path = "/" + parts[3] if len(parts) > 3 else "/"
+    path = path.partition("?")[0].partition("#")[0].lower()
+    return path.rstrip("/") or "/"
 
 
-def _matches_prefix(url: str, prefixes: List[str]) -> bool:
-    path = _normalize_path(url)
-    return any(path.startswith(prefix.rstrip('/')) for prefix in prefixes)
+@dataclass(frozen=True)
+class _NodeTable:
+    """Refined-graph nodes as parallel lists: ``urls[i]``, ``labels[i]``, ``paths[i]``."""
+
+    urls: List[str]
+    labels: List[str]
+    paths: List[str]
+
+
+def _refined_cache_is_current() -> bool:
+    if not REFINED_GRAPH_CACHE.exists():
+        return False
+    built_at = REFINED_GRAPH_CACHE.stat().st_mtime
+    sources = (
+        GRAPH_MODULE,
+        GRAPH_PICKLE,
+        Path(csuchico_graph_cached.__file__),
+        Path(csuchico_graph_refined.__file__),
+    )
+    return all(built_at >= source.stat().st_mtime for source in sources if source.exists())
 
 
 @lru_cache(maxsize=None)
-def get_refined_graph():
-    return create_csuchico_graph_refined()
+def get_refined_graph() -> nx.DiGraph:
+    # Unpickling the refined graph is ~15x faster than loading the full
+    # scrape and refining it, so fresh processes reuse the last build until
+    # the scrape or the refinement code changes.
+    if _refined_cache_is_current():
+        try:
+            with REFINED_GRAPH_CACHE.open("rb") as f:
+                return pickle.load(f)
+        except Exception:
+            pass  # unreadable cache: rebuild and overwrite it below
+
+    graph = create_csuchico_graph_refined()
+    try:
+        REFINED_GRAPH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        partial = REFINED_GRAPH_CACHE.with_suffix(".tmp")
+        with partial.open("wb") as f:
+            pickle.dump(graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+        partial.replace(REFINED_GRAPH_CACHE)
+    except OSError:
+        pass
+    return graph
+
+
+@lru_cache(maxsize=1)
+def _node_table() -> _NodeTable:
+    graph = get_refined_graph()
+    urls = list(graph.nodes())
+    return _NodeTable(
+        urls=urls,
+        labels=[data.get("label", node) for node, data in graph.nodes(data=True)],
+        paths=[_normalize_path(url) for url in urls],
+    )
 
 
 @lru_cache(maxsize=None)
@@ -45,35 +116,26 @@ def get_persona_context(persona: str, limit: int = 60) -> List[Dict[str, str]]:
     if persona not in PERSONA_PREFIXES:
         raise ValueError(f"Unknown persona '{persona}'")
 
-    graph = get_refined_graph()
-    prefixes = PERSONA_PREFIXES[persona]
-
-    context = []
-    for node, data in graph.nodes(data=True):
-        if _matches_prefix(node, prefixes):
-            context.append({
-                "url": node,
-                "label": data.get("label", node),
-            })
+    table = _node_table()
+    urls, labels, paths = table.urls, table.labels, table.paths
+    prefixes = _PERSONA_PREFIXES[persona]
 
+    # Candidates are node indices; dicts are only built for pages that survive
+    # deduplication and the limit.
+    candidates = [idx for idx, path in enumerate(paths) if path.startswith(prefixes)]
     support_pages = [
-        {
-            "url": node,
-            "label": data.get("label", node),
-        }
-        for node, data in graph.nodes(data=True)
-        if _matches_prefix(node, list(GLOBAL_SUPPORT_PREFIXES))
+        idx for idx, path in enumerate(paths) if path.startswith(_SUPPORT_PREFIXES)
     ]
-    context.extend(sorted(support_pages, key=lambda item: item["label"])[:20])
+    candidates.extend(sorted(support_pages, key=labels.__getitem__)[:20])
 
     seen = set()
     deduped = []
-    for item in context:
-        key = _normalize_path(item["url"])
+    for idx in candidates:
+        key = paths[idx]
         if key in seen:
             continue
         seen.add(key)
-        deduped.append(item)
+        deduped.append({"url": urls[idx], "label": labels[idx]})
         if len(deduped) >= limit:
             break
 
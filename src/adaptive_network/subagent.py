@@ -1,32 +1,27 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from importlib import resources
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
-from .llm import call_claude
+from . import json_compat
+from .llm import call_claude, strip_fence
 
 
-def _read_prompt(resource_name: str, override: Path | None = None) -> str:
-    if override is not None:
-        return override.read_text(encoding="utf-8")
+# Packaged templates never change at runtime; override files are re-read so
+# edits to them still take effect.
+@lru_cache(maxsize=None)
+def _packaged_prompt(resource_name: str) -> str:
     resource = resources.files("adaptive_network.prompts").joinpath(resource_name)
     return resource.read_text(encoding="utf-8")
 
 
-def _strip_fence(text: str) -> str:
-    raw = text.strip()
-    if raw.startswith("```"):
-        lines = raw.splitlines()
-        if lines and lines[0].startswith("```"):
-            lines = lines[1:]
-        if lines and lines and lines[0].lower().startswith("json"):
-            lines = lines[1:]
-        if lines and lines[-1].startswith("```"):
-            lines = lines[:-1]
-        raw = "\n".join(lines).strip()
-    return raw
+def _read_prompt(resource_name: str, override: Path | None = None) -> str:
+    if override is not None:
+        return override.read_text(encoding="utf-8")
+    return _packaged_prompt(resource_name)
 
 
 def _format_context(context: Iterable[Dict[str, str]]) -> str:
@@ -54,7 +49,7 @@ def run_subagent(
     subagent_response = call_claude(subagent_prompt)
 
     try:
-        payload = json.loads(_strip_fence(subagent_response.text))
+        payload = json_compat.loads(strip_fence(subagent_response.text))
     except json.JSONDecodeError:
         payload = {
             "chosen_url": None,
@@ -74,7 +69,7 @@ def run_subagent(
     critique_response = call_claude(critique_prompt)
 
     try:
-        critique_payload = json.loads(_strip_fence(critique_response.text))
+        critique_payload = json_compat.loads(strip_fence(critique_response.text))
     except json.JSONDecodeError:
         critique_payload = {
             "state": "fail",